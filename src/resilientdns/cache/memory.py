@@ -1,16 +1,56 @@
+import asyncio
+import heapq
 import time
 from collections import OrderedDict
-from dataclasses import dataclass
-from typing import TypeAlias
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Final, TypeAlias
 
 from dnslib import RCODE, DNSRecord
 
+from resilientdns.dns.wire import min_answer_ttl
 from resilientdns.metrics import Metrics
 
-_HIT_CAP = 1024
+_HIT_CAP: Final = 1024
+# How many inserts between checks for dead expiry-heap records.
+_HEAP_COMPACT_INTERVAL: Final = 1024
 
+# Coarse monotonic clock shared by the cache hot paths. While run_clock_ticker()
+# is running this holds a timestamp refreshed every tick; otherwise it is None and
+# _now() falls back to time.monotonic().
+_cached_now: float | None = None
 
-@dataclass(frozen=True)
+
+def _noop(*_args: object) -> None:
+    return None
+
+
+def _now() -> float:
+    now = _cached_now
+    if now is None:
+        return time.monotonic()
+    return now
+
+
+async def run_clock_ticker(tick_ms: int = 10) -> None:
+    """
+    Keep the cached cache clock fresh until cancelled. The loop wakes every tick even
+    when idle (100 times a second at the default); cache reads and writes may lag real
+    time by up to one tick, which is noise next to second-granularity TTLs.
+    """
+    if tick_ms < 1:
+        raise ValueError("tick_ms must be >= 1")
+    global _cached_now
+    tick_s = tick_ms / 1000.0
+    try:
+        while True:
+            _cached_now = time.monotonic()
+            await asyncio.sleep(tick_s)
+    finally:
+        _cached_now = None
+
+
+@dataclass(frozen=True, slots=True)
 class CacheConfig:
     # If upstream fails, how long can we serve expired answers?
     serve_stale_max_s: int = 300  # 5 minutes
@@ -20,7 +60,7 @@ class CacheConfig:
     max_entries: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class CacheEntry:
     response_wire: bytes
     expires_at: float
@@ -28,47 +68,107 @@ class CacheEntry:
     rcode: int
     hits: int = 0
     last_hit_mono: float = 0.0
+    # CLOCK reference bit: set on a hit, cleared when the eviction hand passes.
+    referenced: bool = False
+    is_negative: bool = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.is_negative = self.rcode != RCODE.NOERROR
 
 
 CacheKey: TypeAlias = tuple[str, int, int]
 
 
+def _make_get_fresh(
+    store_get: Callable[[CacheKey], CacheEntry | None],
+    inc: Callable[[str], None] | None,
+) -> Callable[[CacheKey], bytes | None]:
+    """Build a get_fresh specialized for whether hits are counted in metrics."""
+    if inc is None:
+
+        def get_fresh(key: CacheKey) -> bytes | None:
+            e = store_get(key)
+            if e is None:
+                return None
+            now = _now()
+            if now > e.expires_at:
+                return None
+            h = e.hits
+            if h < _HIT_CAP:
+                e.hits = h + 1
+            e.last_hit_mono = now
+            e.referenced = True
+            return e.response_wire
+
+        return get_fresh
+
+    def get_fresh_counted(key: CacheKey) -> bytes | None:
+        e = store_get(key)
+        if e is None:
+            return None
+        now = _now()
+        if now > e.expires_at:
+            return None
+        h = e.hits
+        if h < _HIT_CAP:
+            e.hits = h + 1
+        e.last_hit_mono = now
+        e.referenced = True
+        if e.is_negative:
+            inc("negative_cache_hit_total")
+        return e.response_wire
+
+    return get_fresh_counted
+
+
 class MemoryDnsCache:
     """
     Simple in-memory DNS cache keyed by (qname_lower, qtype_int, qclass_int).
     Stores full wire response bytes.
+
+    Capacity eviction uses CLOCK (second chance): insertion order forms the ring,
+    a hit only sets the entry's reference bit, and the eviction hand walks from
+    the oldest entry, re-queueing referenced entries once before evicting.
+
+    get_fresh is bound per instance to a closure picked in __init__, so the hit
+    path carries no metrics branch when metrics are disabled.
     """
 
     def __init__(self, config: CacheConfig, metrics: Metrics | None = None):
         self.config = config
         self.metrics = metrics
-        self._store: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
-
-    def get_fresh(self, key: CacheKey) -> bytes | None:
-        e = self._store.get(key)
-        if not e:
-            return None
-        now = time.monotonic()
-        if now <= e.expires_at:
-            e.hits = min(_HIT_CAP, e.hits + 1)
-            e.last_hit_mono = now
-            self._count_negative(e)
-            self._touch(key)
-            return e.response_wire
-        return None
+        # CacheConfig is frozen; copy the fields read on every put.
+        self._serve_stale_max_s: Final = config.serve_stale_max_s
+        self._negative_ttl_s: Final = config.negative_ttl_s
+        self._max_entries: Final = config.max_entries
+        # Bound once so call sites skip the None check and attribute chain.
+        self._inc = metrics.inc if metrics else _noop
+        self._set = metrics.set if metrics else _noop
+        self._store: Final[OrderedDict[CacheKey, CacheEntry]] = OrderedDict()
+        self._store_get = self._store.get
+        self.get_fresh = _make_get_fresh(self._store_get, metrics.inc if metrics else None)
+        # Min-heap of (stale_until, key) for expired-first eviction. Records for
+        # replaced or evicted entries are skipped lazily when popped.
+        self._expiry_heap: list[tuple[float, CacheKey]] = []
+        # Min-heap of (expires_at, key) for refresh-ahead scans; None until first used.
+        self._refresh_heap: list[tuple[float, CacheKey]] | None = None
+        self._inserts_since_compact = 0
 
     def get_stale(self, key: CacheKey) -> bytes | None:
-        e = self._store.get(key)
-        if not e:
+        e = self._store_get(key)
+        if e is None:
             return None
-        now = time.monotonic()
-        if e.expires_at < now <= e.stale_until:
-            e.hits = min(_HIT_CAP, e.hits + 1)
-            e.last_hit_mono = now
-            self._count_negative(e)
-            self._touch(key)
-            return e.response_wire
-        return None
+        now = _now()
+        if not e.expires_at < now <= e.stale_until:
+            return None
+        # Stale hits do not set the reference bit, so expired entries churn out first.
+        h = e.hits
+        if h < _HIT_CAP:
+            e.hits = h + 1
+        e.last_hit_mono = now
+        if e.is_negative:
+            self._inc("negative_cache_hit_total")
+        return e.response_wire
 
     def peek(self, key: CacheKey) -> CacheEntry | None:
         return self._store.get(key)
@@ -76,82 +176,135 @@ class MemoryDnsCache:
     def entries_snapshot(self) -> list[tuple[CacheKey, CacheEntry]]:
         return list(self._store.items())
 
-    def put(self, key: CacheKey, response: DNSRecord) -> None:
-        now = time.monotonic()
-
-        ttl = self._compute_ttl_seconds(response)
-        ttl = max(0, ttl)
-
-        expires_at = now + ttl
-        stale_until = expires_at + self.config.serve_stale_max_s
-
-        self._store[key] = CacheEntry(
-            response_wire=response.pack(),
-            expires_at=expires_at,
-            stale_until=stale_until,
-            rcode=response.header.rcode,
-            hits=0,
-            last_hit_mono=0.0,
+    def put(self, key: CacheKey, response: DNSRecord, wire: bytes | None = None) -> None:
+        """Cache a parsed response; pass the original wire bytes to skip re-packing."""
+        rcode = response.header.rcode
+        ttl = None
+        if wire is None:
+            wire = response.pack()
+        elif rcode == RCODE.NOERROR:
+            # Read answer TTLs from the wire; SOA/negative cases go through dnslib.
+            try:
+                ttl = min_answer_ttl(wire)
+            except ValueError:
+                ttl = None
+        if ttl is None:
+            ttl = self._compute_ttl_seconds(response)
+        self.put_wire(key, wire, rcode, ttl)
+
+    def put_wire(self, key: CacheKey, wire: bytes, rcode: int, ttl: int) -> None:
+        """Cache response bytes verbatim with a caller-computed TTL."""
+        expires_at = _now() + max(0, ttl)
+        stale_until = expires_at + self._serve_stale_max_s
+
+        self._insert(
+            key,
+            CacheEntry(
+                response_wire=wire,
+                expires_at=expires_at,
+                stale_until=stale_until,
+                rcode=rcode,
+                hits=0,
+                last_hit_mono=0.0,
+            ),
         )
-        self._touch(key)
         self._evict_if_needed()
         self._update_cache_entries()
 
     def _put_entry_for_test(self, key: CacheKey, entry: CacheEntry) -> None:
         """Test helper; not part of public API."""
-        self._store[key] = entry
-        self._touch(key)
+        self._insert(key, entry)
         self._update_cache_entries()
 
-    def _count_negative(self, entry: CacheEntry) -> None:
-        if self.metrics and entry.rcode != RCODE.NOERROR:
-            self.metrics.inc("negative_cache_hit_total")
-
-    def _touch(self, key: CacheKey) -> None:
-        if key in self._store:
-            self._store.move_to_end(key)
+    def _insert(self, key: CacheKey, entry: CacheEntry) -> None:
+        # New and replaced entries join the ring behind the hand.
+        self._store[key] = entry
+        self._store.move_to_end(key)
+        refresh_heap = self._refresh_heap
+        if refresh_heap is not None:
+            heapq.heappush(refresh_heap, (entry.expires_at, key))
+        elif self._max_entries == 0:
+            return
+        if self._max_entries:
+            heapq.heappush(self._expiry_heap, (entry.stale_until, key))
+        self._inserts_since_compact += 1
+        if self._inserts_since_compact >= _HEAP_COMPACT_INTERVAL:
+            self._inserts_since_compact = 0
+            self._compact_heaps()
+
+    def _compact_heaps(self) -> None:
+        limit = 2 * len(self._store)
+        if len(self._expiry_heap) > limit:
+            self._expiry_heap = [(e.stale_until, k) for k, e in self._store.items()]
+            heapq.heapify(self._expiry_heap)
+        if self._refresh_heap is not None and len(self._refresh_heap) > limit:
+            self._refresh_heap = [(e.expires_at, k) for k, e in self._store.items()]
+            heapq.heapify(self._refresh_heap)
+
+    def refresh_window(self, now: float, horizon: float) -> list[tuple[CacheKey, CacheEntry]]:
+        """
+        Live entries whose expires_at falls within [now, horizon], soonest first.
+        The expiry index is built on first use, so caches that never refresh pay nothing.
+        """
+        heap = self._refresh_heap
+        if heap is None:
+            heap = [(e.expires_at, k) for k, e in self._store.items()]
+            heapq.heapify(heap)
+            self._refresh_heap = heap
+        due: dict[CacheKey, CacheEntry] = {}
+        while heap and heap[0][0] <= horizon:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._store.get(key)
+            if entry is None or entry.expires_at != expires_at or expires_at < now:
+                continue
+            due[key] = entry
+        # Due entries stay indexed until they expire or are replaced.
+        for key, entry in due.items():
+            heapq.heappush(heap, (entry.expires_at, key))
+        return list(due.items())
 
     def _evict_if_needed(self) -> None:
-        if self.config.max_entries == 0:
+        max_entries = self._max_entries
+        if max_entries == 0 or len(self._store) <= max_entries:
             return
-        if len(self._store) <= self.config.max_entries:
-            return
-        now = time.monotonic()
-        for key, entry in list(self._store.items()):
-            if len(self._store) <= self.config.max_entries:
-                return
-            if now > entry.stale_until:
-                if self._store.pop(key, None) is not None:
-                    if self.metrics:
-                        self.metrics.inc("evictions_total")
-        while len(self._store) > self.config.max_entries:
-            self._store.popitem(last=False)
-            if self.metrics:
-                self.metrics.inc("evictions_total")
+        now = _now()
+        heap = self._expiry_heap
+        while len(self._store) > max_entries and heap and heap[0][0] < now:
+            stale_until, key = heapq.heappop(heap)
+            entry = self._store.get(key)
+            if entry is None or entry.stale_until != stale_until:
+                continue
+            del self._store[key]
+            self._inc("evictions_total")
+        while len(self._store) > max_entries:
+            key, entry = self._store.popitem(last=False)
+            if entry.referenced:
+                entry.referenced = False
+                self._store[key] = entry
+                continue
+            self._inc("evictions_total")
 
     def _update_cache_entries(self) -> None:
-        if self.metrics:
-            self.metrics.set("cache_entries", len(self._store))
+        self._set("cache_entries", len(self._store))
 
     def stats_snapshot(self) -> dict[str, int]:
-        now = time.monotonic()
+        now = _now()
         expired_total = 0
         stale_servable_total = 0
-        fresh_total = 0
         negative_total = 0
         for entry in self._store.values():
-            if entry.expires_at <= now:
+            expires_at = entry.expires_at
+            if expires_at <= now:
                 expired_total += 1
-                if entry.expires_at < now <= entry.stale_until:
+                if expires_at < now <= entry.stale_until:
                     stale_servable_total += 1
-            else:
-                fresh_total += 1
-            if entry.rcode != RCODE.NOERROR:
+            if entry.is_negative:
                 negative_total += 1
+        fresh_total = len(self._store) - expired_total
 
         evictions_total = 0
         if self.metrics:
-            evictions_total = self.metrics.snapshot().get("evictions_total", 0)
+            evictions_total = self.metrics.get("evictions_total")
 
         return {
             "entries_total": len(self._store),
@@ -164,9 +317,10 @@ class MemoryDnsCache:
 
     def clear(self) -> None:
         self._store.clear()
-        if self.metrics:
-            self.metrics.set("cache_entries", 0)
-            self.metrics.inc("cache_clears_total")
+        self._expiry_heap.clear()
+        self._refresh_heap = None
+        self._set("cache_entries", 0)
+        self._inc("cache_clears_total")
 
     def _compute_ttl_seconds(self, resp: DNSRecord) -> int:
         """
@@ -177,19 +331,19 @@ class MemoryDnsCache:
         rcode = resp.header.rcode
 
         # Positive: use answer TTLs
-        if rcode == RCODE.NOERROR and len(resp.rr) > 0:
-            return int(min(r.ttl for r in resp.rr if hasattr(r, "ttl")))
+        if rcode == RCODE.NOERROR and resp.rr:
+            best = None
+            for r in resp.rr:
+                t = r.ttl
+                if best is None or t < best:
+                    best = t
+            return int(best)
 
         # Negative or NOERROR with no answers (NODATA): try SOA MINIMUM in authority
         for r in resp.auth:
-            if getattr(r, "rtype", None) == 6:  # SOA=6
-                soa_rdata = getattr(r, "rdata", None)
-                minttl = getattr(soa_rdata, "minttl", None)
-                if minttl is None:
-                    times = getattr(soa_rdata, "times", None)
-                    if isinstance(times, (list, tuple)) and len(times) >= 5:
-                        minttl = times[4]
-                if minttl is not None:
-                    return int(minttl)
-
-        return self.config.negative_ttl_s
+            if r.rtype == 6:  # SOA=6
+                times = getattr(r.rdata, "times", None)
+                if isinstance(times, (list, tuple)) and len(times) >= 5:
+                    return int(times[4])
+
+        return self._negative_ttl_s
@@ -1,4 +1,5 @@
 import argparse
+from collections.abc import Callable
 from dataclasses import dataclass
 
 from resilientdns.relay_types import (
@@ -26,6 +27,12 @@ class Config:
     tcp_pool_max_conns: int = 4
     tcp_pool_idle_timeout_s: float = 30.0
     udp_max_workers: int = 32
+    parse_offload_min_bytes: int = 0
+    udp_busy_poll_us: int = 0
+    listen_rcvbuf_bytes: int = 0
+    listen_sndbuf_bytes: int = 0
+    listen_reuse_port: bool = False
+    workers: int = 1
     verbose: bool = False
     relay_base_url: str | None = None
     relay_api_version: int = 1
@@ -35,6 +42,7 @@ class Config:
     relay_max_request_bytes: int = 65536
     relay_per_item_max_wire_bytes: int = 4096
     relay_max_response_bytes: int = 262144
+    relay_batch_window_ms: float = 0.0
     refresh_enabled: bool = False
     refresh_ahead_seconds: int = 30
     refresh_popularity_threshold: int = 5
@@ -49,18 +57,24 @@ class Config:
 
 
 def build_config(args: argparse.Namespace) -> Config:
-    return Config(
+    """Build a Config from parsed CLI args and validate it; raises ValueError if invalid."""
+    cfg = Config(
         listen_host=args.listen_host,
         listen_port=args.listen_port,
         max_inflight=args.max_inflight,
         metrics_host=args.metrics_host,
         metrics_port=args.metrics_port,
+        listen_rcvbuf_bytes=args.listen_rcvbuf,
+        listen_sndbuf_bytes=args.listen_sndbuf,
+        udp_busy_poll_us=args.udp_busy_poll_us,
+        workers=args.workers,
         upstream_transport=args.upstream_transport,
         upstream_host=args.upstream_host,
         upstream_port=args.upstream_port,
         upstream_timeout_s=args.upstream_timeout,
         serve_stale_max_s=args.serve_stale_max,
         negative_ttl_s=args.negative_ttl,
+        parse_offload_min_bytes=args.parse_offload_min_bytes,
         verbose=args.verbose,
         relay_base_url=args.relay_base_url,
         relay_api_version=args.relay_api_version,
@@ -70,6 +84,7 @@ def build_config(args: argparse.Namespace) -> Config:
         relay_max_request_bytes=args.relay_max_request_bytes,
         relay_per_item_max_wire_bytes=args.relay_per_item_max_wire_bytes,
         relay_max_response_bytes=args.relay_max_response_bytes,
+        relay_batch_window_ms=args.relay_batch_window_ms,
         refresh_enabled=args.refresh_enabled,
         refresh_ahead_seconds=args.refresh_ahead_seconds,
         refresh_popularity_threshold=args.refresh_popularity_threshold,
@@ -82,68 +97,77 @@ def build_config(args: argparse.Namespace) -> Config:
         refresh_warmup_file=args.refresh_warmup_file,
         refresh_warmup_limit=args.refresh_warmup_limit,
     )
+    validate_config(cfg)
+    return cfg
 
 
-def validate_config(cfg: Config) -> None:
-    if not cfg.listen_host.strip():
-        raise ValueError("listen_host must be non-empty")
-    if not cfg.upstream_host.strip():
-        raise ValueError("upstream_host must be non-empty")
-    if not cfg.metrics_host.strip():
-        raise ValueError("metrics_host must be non-empty")
+def _bad_port(port: int) -> bool:
+    return port < 1 or port > 65535
 
-    if cfg.listen_port < 1 or cfg.listen_port > 65535:
-        raise ValueError("listen_port must be between 1 and 65535")
-    if cfg.upstream_port < 1 or cfg.upstream_port > 65535:
-        raise ValueError("upstream_port must be between 1 and 65535")
-    if cfg.metrics_port != 0 and (cfg.metrics_port < 1 or cfg.metrics_port > 65535):
-        raise ValueError("metrics_port must be 0 or between 1 and 65535")
 
-    if cfg.upstream_transport not in ("udp", "tcp", "relay"):
-        raise ValueError("upstream_transport must be 'udp', 'tcp', or 'relay'")
+# (predicate, message) pairs checked in order; a predicate returns True when invalid.
+_CHECKS: tuple[tuple[Callable[[Config], bool], str], ...] = (
+    (lambda c: not c.listen_host.strip(), "listen_host must be non-empty"),
+    (lambda c: not c.upstream_host.strip(), "upstream_host must be non-empty"),
+    (lambda c: not c.metrics_host.strip(), "metrics_host must be non-empty"),
+    (lambda c: _bad_port(c.listen_port), "listen_port must be between 1 and 65535"),
+    (lambda c: _bad_port(c.upstream_port), "upstream_port must be between 1 and 65535"),
+    (
+        lambda c: c.metrics_port != 0 and _bad_port(c.metrics_port),
+        "metrics_port must be 0 or between 1 and 65535",
+    ),
+    (
+        lambda c: c.upstream_transport not in ("udp", "tcp", "relay"),
+        "upstream_transport must be 'udp', 'tcp', or 'relay'",
+    ),
+    (lambda c: c.upstream_timeout_s <= 0, "upstream_timeout_s must be > 0"),
+    (lambda c: c.serve_stale_max_s < 0, "serve_stale_max_s must be >= 0"),
+    (lambda c: c.negative_ttl_s < 0, "negative_ttl_s must be >= 0"),
+    (lambda c: c.cache_max_entries < 0, "cache_max_entries must be >= 0"),
+    (lambda c: c.refresh_ahead_seconds < 0, "refresh_ahead_seconds must be >= 0"),
+    (lambda c: c.refresh_popularity_threshold < 0, "refresh_popularity_threshold must be >= 0"),
+    (
+        lambda c: c.refresh_popularity_decay_seconds < 0,
+        "refresh_popularity_decay_seconds must be >= 0",
+    ),
+    (lambda c: c.refresh_tick_ms <= 0, "refresh_tick_ms must be > 0"),
+    (lambda c: c.refresh_batch_size <= 0, "refresh_batch_size must be > 0"),
+    (
+        lambda c: c.refresh_enabled and c.refresh_concurrency <= 0,
+        "refresh_concurrency must be >= 1 when refresh is enabled",
+    ),
+    (lambda c: c.refresh_concurrency < 0, "refresh_concurrency must be >= 0"),
+    (lambda c: c.refresh_queue_max < 0, "refresh_queue_max must be >= 0"),
+    (
+        lambda c: c.refresh_warmup_enabled and not c.refresh_enabled,
+        "Warmup requires refresh_enabled=true because warmup jobs are executed "
+        "by refresh workers.",
+    ),
+    (
+        lambda c: c.refresh_warmup_enabled and not c.refresh_warmup_file,
+        "refresh_warmup_file is required when warmup is enabled",
+    ),
+    (
+        lambda c: c.refresh_warmup_enabled and c.refresh_warmup_limit <= 0,
+        "refresh_warmup_limit must be > 0 when warmup is enabled",
+    ),
+    (lambda c: c.max_inflight < 1, "max_inflight must be >= 1"),
+    (lambda c: c.udp_max_workers < 1, "udp_max_workers must be >= 1"),
+    (lambda c: c.tcp_pool_max_conns < 0, "tcp_pool_max_conns must be >= 0"),
+    (lambda c: c.tcp_pool_idle_timeout_s <= 0, "tcp_pool_idle_timeout_s must be > 0"),
+    (lambda c: c.parse_offload_min_bytes < 0, "parse_offload_min_bytes must be >= 0"),
+    (lambda c: c.udp_busy_poll_us < 0, "udp_busy_poll_us must be >= 0"),
+    (lambda c: c.relay_batch_window_ms < 0, "relay_batch_window_ms must be >= 0"),
+    (lambda c: c.listen_rcvbuf_bytes < 0, "listen_rcvbuf_bytes must be >= 0"),
+    (lambda c: c.listen_sndbuf_bytes < 0, "listen_sndbuf_bytes must be >= 0"),
+    (lambda c: c.workers < 1, "workers must be >= 1"),
+)
 
-    if cfg.upstream_timeout_s <= 0:
-        raise ValueError("upstream_timeout_s must be > 0")
-    if cfg.serve_stale_max_s < 0:
-        raise ValueError("serve_stale_max_s must be >= 0")
-    if cfg.negative_ttl_s < 0:
-        raise ValueError("negative_ttl_s must be >= 0")
-    if cfg.cache_max_entries < 0:
-        raise ValueError("cache_max_entries must be >= 0")
-    if cfg.refresh_ahead_seconds < 0:
-        raise ValueError("refresh_ahead_seconds must be >= 0")
-    if cfg.refresh_popularity_threshold < 0:
-        raise ValueError("refresh_popularity_threshold must be >= 0")
-    if cfg.refresh_popularity_decay_seconds < 0:
-        raise ValueError("refresh_popularity_decay_seconds must be >= 0")
-    if cfg.refresh_tick_ms <= 0:
-        raise ValueError("refresh_tick_ms must be > 0")
-    if cfg.refresh_batch_size <= 0:
-        raise ValueError("refresh_batch_size must be > 0")
-    if cfg.refresh_enabled and cfg.refresh_concurrency <= 0:
-        raise ValueError("refresh_concurrency must be >= 1 when refresh is enabled")
-    if cfg.refresh_concurrency < 0:
-        raise ValueError("refresh_concurrency must be >= 0")
-    if cfg.refresh_queue_max < 0:
-        raise ValueError("refresh_queue_max must be >= 0")
-    if cfg.refresh_warmup_enabled and not cfg.refresh_enabled:
-        raise ValueError(
-            "Warmup requires refresh_enabled=true because warmup jobs are executed "
-            "by refresh workers."
-        )
-    if cfg.refresh_warmup_enabled and not cfg.refresh_warmup_file:
-        raise ValueError("refresh_warmup_file is required when warmup is enabled")
-    if cfg.refresh_warmup_enabled and cfg.refresh_warmup_limit <= 0:
-        raise ValueError("refresh_warmup_limit must be > 0 when warmup is enabled")
 
-    if cfg.max_inflight < 1:
-        raise ValueError("max_inflight must be >= 1")
-    if cfg.udp_max_workers < 1:
-        raise ValueError("udp_max_workers must be >= 1")
-    if cfg.tcp_pool_max_conns < 0:
-        raise ValueError("tcp_pool_max_conns must be >= 0")
-    if cfg.tcp_pool_idle_timeout_s <= 0:
-        raise ValueError("tcp_pool_idle_timeout_s must be > 0")
+def validate_config(cfg: Config) -> None:
+    for invalid, message in _CHECKS:
+        if invalid(cfg):
+            raise ValueError(message)
 
     if cfg.relay_base_url:
         validate_base_url(cfg.relay_base_url)
@@ -1,17 +1,61 @@
 import asyncio
-import contextlib
+import inspect
 import logging
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
-from dnslib import CLASS, QTYPE, RCODE, DNSRecord
+from dnslib import CLASS, QTYPE, RCODE, DNSLabel, DNSRecord
 
 from resilientdns.cache.memory import MemoryDnsCache
 from resilientdns.dns.singleflight import SingleFlight
+from resilientdns.dns.wire import read_question, with_txid
 from resilientdns.metrics import Metrics
 
 logger = logging.getLogger("resilientdns")
 
+# Bound on memoized qname normalizations; the memo is reset when full.
+_QNAME_CACHE_MAX = 4096
+# Bound on cached refresh query templates; reset when full.
+_REFRESH_WIRE_CACHE_MAX = 4096
+
+_QUEUED = 1
+_INFLIGHT = 2
+
+# Reverse lookups copied out of dnslib's Bimaps (1 -> "A", 1 -> "IN").
+_QTYPE_NAMES: dict[int, str] = dict(QTYPE.forward)
+_CLASS_NAMES: dict[int, str] = dict(CLASS.forward)
+
+
+def _noop() -> None:
+    return None
+
+
+def _qtype_name(qtype_id: int) -> str:
+    name = _QTYPE_NAMES.get(qtype_id)
+    if name is None:
+        try:
+            name = QTYPE[qtype_id]  # dnslib renders unknown types as "TYPE<n>"
+        except Exception:
+            name = str(qtype_id)
+    return name
+
+
+def _accepts_request_id(upstream: object) -> bool:
+    try:
+        params = inspect.signature(upstream.query).parameters  # type: ignore[attr-defined]
+    except (AttributeError, TypeError, ValueError):
+        return False
+    if "request_id" in params:
+        return True
+    return any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values())
+
+
+def _qclass_name(qclass_id: int) -> str:
+    name = _CLASS_NAMES.get(qclass_id)
+    return str(qclass_id) if name is None else name
+
 
 @dataclass(frozen=True)
 class HandlerConfig:
@@ -28,6 +72,9 @@ class HandlerConfig:
     refresh_tick_ms: int = 500
     refresh_batch_size: int = 50
     refresh_concurrency: int = 5
+    # Parse upstream responses of at least this many bytes in a worker thread so
+    # large answers do not stall the event loop (0 = always parse inline).
+    parse_offload_min_bytes: int = 0
 
 
 class DnsHandler:
@@ -37,7 +84,8 @@ class DnsHandler:
     - Negative caching (via MemoryDnsCache)
     - Serve-stale on upstream failure
     - Stale-while-revalidate (SWR): serve stale immediately and refresh in background
-    - SingleFlight: deduplicate concurrent misses and concurrent refreshes per key
+    - SingleFlight: deduplicate concurrent misses per key
+    - Refresh state map: at most one queued or inflight refresh per key
     """
 
     def __init__(
@@ -48,29 +96,66 @@ class DnsHandler:
         metrics: Metrics | None = None,
     ):
         self.upstream = upstream
+        self._upstream_takes_request_id = _accepts_request_id(upstream)
         self.cache = cache
         self.config = config or HandlerConfig()
         self.metrics = metrics
+        # Per-query info logs are gated on this; the level is set once at startup.
+        self._log_info = logger.isEnabledFor(logging.INFO)
+        # Fixed-name counters bound once so the per-query path skips the metrics check.
+        counter = metrics.counter if metrics else lambda _key: _noop
+        self._ctr_queries = counter("queries_total")
+        self._ctr_hit_fresh = counter("cache_hit_fresh_total")
+        self._ctr_hit_stale = counter("cache_hit_stale_total")
+        self._ctr_miss = counter("cache_miss_total")
+        self._ctr_upstream_fail = counter("upstream_fail_total")
+        self._ctr_swr_refresh = counter("swr_refresh_triggered_total")
+        self._ctr_refresh_enqueued = counter("cache_refresh_enqueued_total")
+        self._ctr_refresh_dup = counter("cache_refresh_dropped_total{reason=duplicate}")
+        self._ctr_refresh_full = counter("cache_refresh_dropped_total{reason=queue_full}")
+        self._ctr_refresh_skipped = counter("cache_refresh_completed_total{result=skipped}")
         self._sf = SingleFlight(metrics=metrics)
         self.refresh_queue: asyncio.Queue[tuple[tuple[str, int, int], str]] = asyncio.Queue(
             maxsize=self.config.refresh_queue_max
         )
-        self.queued_keys: set[tuple[str, int, int]] = set()
-        self.inflight_keys: set[tuple[str, int, int]] = set()
+        # Refresh dedup: key -> _QUEUED or _INFLIGHT; absent when idle.
+        self._refresh_state: dict[tuple[str, int, int], int] = {}
+        # Strong references for fire-and-forget stale-while-revalidate tasks.
+        self._swr_tasks: set[asyncio.Task] = set()
         self._refresh_tasks: list[asyncio.Task] = []
+        self._qname_cache: dict[tuple[bytes, ...], str] = {}
+        self._refresh_wire_cache: dict[tuple[str, int, int], bytes] = {}
+        self._parse_executor: ThreadPoolExecutor | None = None
+        if self.config.parse_offload_min_bytes > 0:
+            self._parse_executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="resilientdns-parse"
+            )
+
+    # Read-only snapshots for inspection and tests; each access scans _refresh_state.
+    @property
+    def queued_keys(self) -> frozenset[tuple[str, int, int]]:
+        return frozenset(k for k, state in self._refresh_state.items() if state == _QUEUED)
+
+    @property
+    def inflight_keys(self) -> frozenset[tuple[str, int, int]]:
+        return frozenset(k for k, state in self._refresh_state.items() if state == _INFLIGHT)
 
     async def handle(self, request: DNSRecord, client_addr) -> DNSRecord:
+        return DNSRecord.parse(await self.handle_wire(request, client_addr))
+
+    async def handle_wire(self, request: DNSRecord, client_addr) -> bytes:
+        """Like handle(), but returns the reply as wire bytes; cache hits skip parsing."""
+        txid = request.header.id
         if not request.questions:
             reply = request.reply()
             reply.header.rcode = RCODE.FORMERR
-            return reply
+            return reply.pack()
 
         q = request.questions[0]
-        qname = str(q.qname).rstrip(".").lower()
+        qname = self._normalize_qname(q.qname)
         qclass_id = int(q.qclass)
 
-        if self.metrics:
-            self.metrics.inc("queries_total")
+        self._ctr_queries()
 
         qtype_id, qtype_name = self._qtype_mapping(q.qtype)
         key: tuple[str, int, int] = (qname, qtype_id, qclass_id)
@@ -79,64 +164,90 @@ class DnsHandler:
         # 1) Fresh cache
         fresh = self.cache.get_fresh(key)
         if fresh:
-            logger.info("CACHE HIT (fresh) %s %s", qname, qtype_name)
-            if self.metrics:
-                self.metrics.inc("cache_hit_fresh_total")
-            return self._with_txid(request, DNSRecord.parse(fresh))
+            if self._log_info:
+                logger.info("CACHE HIT (fresh) %s %s", qname, qtype_name)
+            self._ctr_hit_fresh()
+            return with_txid(fresh, txid)
 
         # 2) Stale cache => serve immediately and refresh in background
         stale = self.cache.get_stale(key)
         if stale:
-            logger.info("CACHE HIT (stale) %s %s (refresh scheduled)", qname, qtype_name)
-            if self.metrics:
-                self.metrics.inc("cache_hit_stale_total")
+            if self._log_info:
+                logger.info("CACHE HIT (stale) %s %s (refresh scheduled)", qname, qtype_name)
+            self._ctr_hit_stale()
             self.enqueue_refresh(refresh_key, reason="stale_served")
-            await self._schedule_refresh(key, qname, qtype_name, refresh_key)
-            return self._with_txid(request, DNSRecord.parse(stale))
+            self._schedule_refresh(key, qname, qtype_name, refresh_key)
+            return with_txid(stale, txid)
 
         # 3) Cache miss => singleflight upstream resolve
-        if self.metrics:
-            self.metrics.inc("cache_miss_total")
+        self._ctr_miss()
 
-        task, leader = await self._sf.get_or_create(
-            key, lambda: self._resolve_upstream(request, key, qname, qtype_name)
+        task, leader = self._sf.get_or_create(
+            key, self._resolve_request, request, key, qname, qtype_name
         )
-        if leader:
-            logger.info("CACHE MISS (leader) %s %s", qname, qtype_name)
-        else:
-            logger.info("CACHE MISS (join) %s %s", qname, qtype_name)
+        if self._log_info:
+            if leader:
+                logger.info("CACHE MISS (leader) %s %s", qname, qtype_name)
+            else:
+                logger.info("CACHE MISS (join) %s %s", qname, qtype_name)
 
         try:
-            resp = await task
+            resp_wire = await task
         except Exception:
             logger.exception("UPSTREAM ERROR %s %s", qname, qtype_name)
-            resp = None
+            resp_wire = None
 
-        if resp is not None:
-            return self._with_txid(request, resp)
+        # Joiners share the leader's reply bytes; each patches in its own txid.
+        if resp_wire is not None:
+            return with_txid(resp_wire, txid)
 
         # 4) Upstream failed: if stale appeared meanwhile, serve it
         stale2 = self.cache.get_stale(key)
         if stale2:
             logger.warning("SERVE STALE (late) %s %s", qname, qtype_name)
-            if self.metrics:
-                self.metrics.inc("cache_hit_stale_total")
+            self._ctr_hit_stale()
             self.enqueue_refresh(refresh_key, reason="stale_served")
-            await self._schedule_refresh(key, qname, qtype_name, refresh_key)
-            return self._with_txid(request, DNSRecord.parse(stale2))
+            self._schedule_refresh(key, qname, qtype_name, refresh_key)
+            return with_txid(stale2, txid)
 
         reply = request.reply()
         reply.header.rcode = RCODE.SERVFAIL
-        return self._with_txid(request, reply)
+        return reply.pack()
+
+    def try_handle_fresh(self, request_wire: bytes) -> bytes | None:
+        """
+        Answer a fresh cache hit straight from the request bytes, without parsing
+        or a coroutine. Returns None when the caller should take the handle_wire path.
+        """
+        question = read_question(request_wire)
+        if question is None:
+            return None
+        fresh = self.cache.get_fresh(question)
+        if not fresh:
+            return None
+        self._ctr_queries()
+        if self._log_info:
+            qname, qtype_id, _qclass = question
+            logger.info("CACHE HIT (fresh) %s %s", qname, _qtype_name(qtype_id))
+        self._ctr_hit_fresh()
+        # The client's txid is the first two bytes of its request.
+        return request_wire[:2] + memoryview(fresh)[2:]
+
+    def _normalize_qname(self, qname: DNSLabel) -> str:
+        # Memoize on the raw label tuple; str(DNSLabel) is costly on every query.
+        labels = qname.label
+        name = self._qname_cache.get(labels)
+        if name is None:
+            name = str(qname).rstrip(".").lower()
+            if len(self._qname_cache) >= _QNAME_CACHE_MAX:
+                self._qname_cache.clear()
+            self._qname_cache[labels] = name
+        return name
 
     def _qtype_mapping(self, qtype) -> tuple[int, str]:
         # Cache key uses integer qtype; dnslib APIs want the string name ("A", "AAAA", ...)
         qtype_id = int(qtype)
-        try:
-            qtype_name = QTYPE[qtype_id]  # reverse lookup: 1 -> "A"
-        except Exception:
-            qtype_name = str(qtype)  # fallback (shouldn't happen)
-        return qtype_id, qtype_name
+        return qtype_id, _qtype_name(qtype_id)
 
     def start_refresh_tasks(self) -> list[asyncio.Task]:
         if not self.config.refresh_enabled:
@@ -153,50 +264,63 @@ class DnsHandler:
             return
         for task in self._refresh_tasks:
             task.cancel()
-        for task in self._refresh_tasks:
-            with contextlib.suppress(asyncio.CancelledError):
-                await task
+        await asyncio.gather(*self._refresh_tasks, return_exceptions=True)
         self._refresh_tasks.clear()
 
-    def _with_txid(self, request: DNSRecord, response: DNSRecord) -> DNSRecord:
-        response.header.id = request.header.id
-        return response
+    def close(self) -> None:
+        if self._parse_executor is not None:
+            self._parse_executor.shutdown(wait=False)
+            self._parse_executor = None
 
-    async def _resolve_upstream(
+    async def _parse_response(self, wire: bytes) -> DNSRecord:
+        executor = self._parse_executor
+        if executor is None or len(wire) < self.config.parse_offload_min_bytes:
+            return DNSRecord.parse(wire)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, DNSRecord.parse, wire)
+
+    async def _resolve_request(
         self, request: DNSRecord, key: tuple[str, int, int], qname: str, qtype_name: str
-    ) -> DNSRecord | None:
-        resp_bytes = await self._query_upstream(
-            request.pack(),
-            qname,
-            qtype_name,
-            request_id=str(request.header.id),
+    ) -> bytes | None:
+        # Packing happens here so only the singleflight leader pays for it.
+        return await self._resolve_upstream(
+            request.pack(), key, qname, qtype_name, str(request.header.id)
         )
+
+    async def _resolve_upstream(
+        self,
+        wire: bytes,
+        key: tuple[str, int, int],
+        qname: str,
+        qtype_name: str,
+        request_id: str,
+    ) -> bytes | None:
+        """Resolve and cache; returns the upstream reply bytes (with its own txid)."""
+        resp_bytes = await self._query_upstream(wire, qname, qtype_name, request_id=request_id)
         if resp_bytes is None:
             return None
 
         try:
-            resp = DNSRecord.parse(resp_bytes)
+            resp = await self._parse_response(resp_bytes)
         except Exception:
             logger.exception("UPSTREAM PARSE FAIL %s %s", qname, qtype_name)
             return None
 
-        self.cache.put(key, resp)
-        logger.info("UPSTREAM OK %s %s (cached)", qname, qtype_name)
-        return resp
+        self.cache.put(key, resp, wire=resp_bytes)
+        if self._log_info:
+            logger.info("UPSTREAM OK %s %s (cached)", qname, qtype_name)
+        return resp_bytes
 
     def enqueue_refresh(self, key: tuple[str, int, int], reason: str) -> bool:
-        if key in self.queued_keys or key in self.inflight_keys:
-            if self.metrics:
-                self.metrics.inc("cache_refresh_dropped_total{reason=duplicate}")
+        if key in self._refresh_state:
+            self._ctr_refresh_dup()
             return False
         if self.refresh_queue.full():
-            if self.metrics:
-                self.metrics.inc("cache_refresh_dropped_total{reason=queue_full}")
+            self._ctr_refresh_full()
             return False
         self.refresh_queue.put_nowait((key, reason))
-        self.queued_keys.add(key)
-        if self.metrics:
-            self.metrics.inc("cache_refresh_enqueued_total")
+        self._refresh_state[key] = _QUEUED
+        self._ctr_refresh_enqueued()
         return True
 
     async def _refresh_scan_loop(self) -> None:
@@ -211,13 +335,8 @@ class DnsHandler:
     async def _refresh_scan_tick(self) -> None:
         now = time.monotonic()
         enqueued = 0
-        entries = self.cache.entries_snapshot()
+        entries = self.cache.refresh_window(now, now + self.config.refresh_ahead_seconds)
         for (qname, qtype_id, qclass_id), entry in entries:
-            remaining = entry.expires_at - now
-            if remaining < 0:
-                continue
-            if remaining > self.config.refresh_ahead_seconds:
-                continue
             if entry.hits < self.config.refresh_popularity_threshold:
                 continue
             if self.config.refresh_popularity_decay_seconds > 0:
@@ -235,10 +354,20 @@ class DnsHandler:
 
     async def _refresh_worker(self, _worker_id: int) -> None:
         try:
+            queue = self.refresh_queue
             while True:
-                refresh_key, _reason = await self.refresh_queue.get()
-                self.queued_keys.discard(refresh_key)
-                self.inflight_keys.add(refresh_key)
+                # Drain without a coroutine round-trip while work is queued.
+                try:
+                    refresh_key, _reason = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    refresh_key, _reason = await queue.get()
+                if self._refresh_state.get(refresh_key) == _INFLIGHT:
+                    # A stale-while-revalidate refresh took this key after it was
+                    # queued; that task owns the mark and clears it when done.
+                    self._ctr_refresh_skipped()
+                    queue.task_done()
+                    continue
+                self._refresh_state[refresh_key] = _INFLIGHT
                 cancelled = False
                 attempted = False
                 result = "skipped"
@@ -256,28 +385,32 @@ class DnsHandler:
                         self.metrics.inc("cache_refresh_started_total")
                     if not cancelled and self.metrics:
                         self.metrics.inc(f"cache_refresh_completed_total{{result={result}}}")
-                    self.inflight_keys.discard(refresh_key)
-                    self.refresh_queue.task_done()
+                    self._clear_inflight(refresh_key)
+                    queue.task_done()
         except asyncio.CancelledError:
             raise
 
-    async def _schedule_refresh(
+    def _schedule_refresh(
         self,
         key: tuple[str, int, int],
         qname: str,
         qtype_name: str,
         refresh_key: tuple[str, int, int],
     ) -> None:
-        # Refresh is deduped too
-        task, leader = await self._sf.get_or_create(
-            ("refresh", key),
-            lambda: self._refresh_once_tracked(key, qname, qtype_name, refresh_key),
-        )
-        if leader:
-            if self.metrics:
-                self.metrics.inc("swr_refresh_triggered_total")
+        # Refresh is deduped by the refresh state map: skip if one is already running
+        # (from an earlier stale hit or a refresh worker). Marking it inflight here,
+        # before the task starts, closes the window for a second stale hit.
+        if self._refresh_state.get(refresh_key) == _INFLIGHT:
+            return
+        self._refresh_state[refresh_key] = _INFLIGHT
+        task = asyncio.create_task(self._refresh_once_tracked(key, qname, qtype_name, refresh_key))
+        self._ctr_swr_refresh()
+        if self._log_info:
             logger.info("REFRESH START %s %s", qname, qtype_name)
-            asyncio.create_task(self._watch_refresh(task, qname, qtype_name))
+        watch = asyncio.create_task(self._watch_refresh(task, qname, qtype_name))
+        for t in (task, watch):
+            self._swr_tasks.add(t)
+            t.add_done_callback(self._swr_tasks.discard)
 
     async def _refresh_once_tracked(
         self,
@@ -285,13 +418,15 @@ class DnsHandler:
         qname: str,
         qtype_name: str,
         refresh_key: tuple[str, int, int],
-    ) -> DNSRecord | None:
-        self.queued_keys.discard(refresh_key)
-        self.inflight_keys.add(refresh_key)
+    ) -> bytes | None:
         try:
             return await self._refresh_once(key, qname, qtype_name)
         finally:
-            self.inflight_keys.discard(refresh_key)
+            self._clear_inflight(refresh_key)
+
+    def _clear_inflight(self, key: tuple[str, int, int]) -> None:
+        if self._refresh_state.get(key) == _INFLIGHT:
+            del self._refresh_state[key]
 
     async def _refresh_via_worker(self, refresh_key: tuple[str, int, int]) -> tuple[bool, str]:
         if not self.config.refresh_enabled:
@@ -314,20 +449,14 @@ class DnsHandler:
                 return False, "skipped"
             if (now - entry.last_hit_mono) > self.config.refresh_popularity_decay_seconds:
                 return False, "skipped"
+        qtype_name = _qtype_name(qtype_id)
+        txid = random.getrandbits(16)
         try:
-            qtype_name = QTYPE[qtype_id]
-        except Exception:
-            qtype_name = str(qtype_id)
-        try:
-            try:
-                qclass_name = CLASS[qclass_id]
-            except Exception:
-                qclass_name = str(qclass_id)
-            request = DNSRecord.question(qname, qtype_name, qclass_name)
+            wire = self._refresh_query_wire(cache_key, qtype_name, txid)
         except Exception:
             return True, "fail"
-        task, _leader = await self._sf.get_or_create(
-            cache_key, lambda: self._resolve_upstream(request, cache_key, qname, qtype_name)
+        task, _leader = self._sf.get_or_create(
+            cache_key, self._resolve_upstream, wire, cache_key, qname, qtype_name, str(txid)
         )
         resp = await task
         if resp is None:
@@ -336,22 +465,17 @@ class DnsHandler:
 
     async def _refresh_once(
         self, key: tuple[str, int, int], qname: str, qtype_name: str
-    ) -> DNSRecord | None:
+    ) -> bytes | None:
         # Build a fresh query for this (qname, qtype_name, qclass)
         try:
-            qclass_id = key[2]
-            try:
-                qclass_name = CLASS[qclass_id]
-            except Exception:
-                qclass_name = str(qclass_id)
-            new_req = DNSRecord.question(qname, qtype_name, qclass_name)
+            wire = self._refresh_query_wire(key, qtype_name, random.getrandbits(16))
         except Exception:
             logger.exception("REFRESH BUILD FAIL %s %s", qname, qtype_name)
             return None
 
         refresh_id = f"refresh-{qname}-{qtype_name}"
         resp_bytes = await self._query_upstream(
-            new_req.pack(),
+            wire,
             qname,
             qtype_name,
             request_id=refresh_id,
@@ -360,28 +484,41 @@ class DnsHandler:
             return None
 
         try:
-            resp = DNSRecord.parse(resp_bytes)
+            resp = await self._parse_response(resp_bytes)
         except Exception:
             logger.exception("REFRESH PARSE FAIL %s %s", qname, qtype_name)
             return None
 
-        self.cache.put(key, resp)
-        return resp
+        self.cache.put(key, resp, wire=resp_bytes)
+        return resp_bytes
+
+    def _refresh_query_wire(self, key: tuple[str, int, int], qtype_name: str, txid: int) -> bytes:
+        # Questions are cached per key with ID 0; each send gets its own random txid.
+        template = self._refresh_wire_cache.get(key)
+        if template is None:
+            qname, _qtype_id, qclass_id = key
+            question = DNSRecord.question(qname, qtype_name, _qclass_name(qclass_id))
+            template = with_txid(question.pack(), 0)
+            if len(self._refresh_wire_cache) >= _REFRESH_WIRE_CACHE_MAX:
+                self._refresh_wire_cache.clear()
+            self._refresh_wire_cache[key] = template
+        return with_txid(template, txid)
 
     async def _watch_refresh(self, task: asyncio.Task, qname: str, qtype_name: str) -> None:
-        try:
-            resp = await asyncio.wait_for(
-                asyncio.shield(task),
-                timeout=self.config.refresh_watch_timeout_s,
-            )
-            if resp is None:
-                logger.error("REFRESH FAIL %s %s", qname, qtype_name)
-            else:
-                logger.info("REFRESH OK %s %s (updated cache)", qname, qtype_name)
-        except asyncio.TimeoutError:
+        # asyncio.wait never cancels the shared task on timeout, so no shield is needed.
+        done, _ = await asyncio.wait({task}, timeout=self.config.refresh_watch_timeout_s)
+        if not done:
             logger.error("REFRESH TIMEOUT %s %s", qname, qtype_name)
+            return
+        try:
+            resp = task.result()
         except Exception:
             logger.exception("REFRESH ERROR %s %s", qname, qtype_name)
+            return
+        if resp is None:
+            logger.error("REFRESH FAIL %s %s", qname, qtype_name)
+        elif self._log_info:
+            logger.info("REFRESH OK %s %s (updated cache)", qname, qtype_name)
 
     async def _query_upstream(
         self,
@@ -391,13 +528,10 @@ class DnsHandler:
         request_id: str | None = None,
     ) -> bytes | None:
         try:
-            if request_id is None:
+            if request_id is None or not self._upstream_takes_request_id:
                 resp = await self.upstream.query(wire)
             else:
-                try:
-                    resp = await self.upstream.query(wire, request_id=request_id)
-                except TypeError:
-                    resp = await self.upstream.query(wire)
+                resp = await self.upstream.query(wire, request_id=request_id)
         except asyncio.TimeoutError:
             logger.warning("UPSTREAM TIMEOUT %s %s", qname, qtype_name)
             resp = None
@@ -406,8 +540,7 @@ class DnsHandler:
             resp = None
 
         if resp is None:
-            if self.metrics:
-                self.metrics.inc("upstream_fail_total")
+            self._ctr_upstream_fail()
             return None
 
         return resp
@@ -1,16 +1,29 @@
 import asyncio
 import json
 import logging
+import socket
+import struct
+import sys
 import time
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
 from importlib import metadata
 
 from dnslib import DNSRecord
 
+from resilientdns.dns.wire import truncate
 from resilientdns.metrics import Metrics
 
 logger = logging.getLogger("resilientdns")
 _PROCESS_START_MONOTONIC = time.monotonic()
+# RFC 1035 TCP framing: 2-byte big-endian length before each message.
+_LEN_PREFIX = struct.Struct(">H")
+# How often the UDP listener flushes locally counted drops into Metrics.
+_DROP_FLUSH_S = 0.1
+
+# Linux socket options; the socket module only exposes them on some builds.
+_SO_BUSY_POLL = getattr(socket, "SO_BUSY_POLL", 46)
+_SO_PREFER_BUSY_POLL = getattr(socket, "SO_PREFER_BUSY_POLL", 69)
 
 
 class ReadyState:
@@ -28,8 +41,16 @@ class ReadyState:
 class UdpServerConfig:
     host: str = "127.0.0.1"
     port: int = 5353
+    # Worker pool size and admission cap; <= 0 handles each datagram in its own task, unbounded.
     max_inflight: int = 256
     max_udp_payload: int = 1232
+    # Linux NAPI busy polling on the listening socket, in microseconds; 0 disables.
+    busy_poll_us: int = 0
+    # Socket buffer sizes in bytes; 0 keeps the kernel default.
+    rcvbuf_bytes: int = 0
+    sndbuf_bytes: int = 0
+    # Let several listeners share the port; the kernel hashes flows across them.
+    reuse_port: bool = False
 
 
 @dataclass(frozen=True)
@@ -40,6 +61,62 @@ class TcpServerConfig:
     max_message_size: int = 65535
     read_timeout_s: float = 2.0
     idle_timeout_s: float = 30.0
+    # Listening socket buffer sizes in bytes, inherited by accepted connections; 0 = default.
+    rcvbuf_bytes: int = 0
+    sndbuf_bytes: int = 0
+    reuse_port: bool = False
+
+
+def _set_buffer_sizes(sock, rcvbuf_bytes: int, sndbuf_bytes: int) -> None:
+    # The kernel caps these at net.core.rmem_max / wmem_max without reporting an error.
+    for opt, size in ((socket.SO_RCVBUF, rcvbuf_bytes), (socket.SO_SNDBUF, sndbuf_bytes)):
+        if size > 0:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, opt, size)
+            except OSError as exc:
+                logger.warning("Socket buffer size %d not applied: %s", size, exc)
+
+
+def _enable_busy_poll(sock: socket.socket, busy_poll_us: int) -> None:
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, _SO_BUSY_POLL, busy_poll_us)
+    except OSError as exc:
+        logger.warning("SO_BUSY_POLL not applied: %s", exc)
+        return
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, _SO_PREFER_BUSY_POLL, 1)
+    except OSError as exc:
+        logger.debug("SO_PREFER_BUSY_POLL not applied: %s", exc)
+
+
+def _is_query(data: bytes) -> bool:
+    # Header-only check before any parsing: at least a full header, and QR clear
+    # (responses sent to the listener are dropped, never answered).
+    return len(data) >= 12 and not data[2] & 0x80
+
+
+def _count_malformed(metrics: Metrics | None) -> None:
+    if metrics:
+        metrics.inc("malformed_total")
+        metrics.inc("dropped_malformed_total")
+
+
+def _fresh_handler(handler) -> Callable[[bytes], bytes | None]:
+    try_handle_fresh = getattr(handler, "try_handle_fresh", None)
+    if try_handle_fresh is not None:
+        return try_handle_fresh
+    return lambda _data: None
+
+
+def _wire_handler(handler) -> Callable[[DNSRecord, object], Awaitable[bytes]]:
+    handle_wire = getattr(handler, "handle_wire", None)
+    if handle_wire is not None:
+        return handle_wire
+
+    async def handle_wire_compat(request: DNSRecord, client_addr) -> bytes:
+        return (await handler.handle(request, client_addr)).pack()
+
+    return handle_wire_compat
 
 
 class UdpDnsServer(asyncio.DatagramProtocol):
@@ -48,22 +125,52 @@ class UdpDnsServer(asyncio.DatagramProtocol):
 
     handler signature:
         async def handle(request: DNSRecord, client_addr) -> DNSRecord
+    If the handler also provides handle_wire() returning reply bytes, it is preferred.
+    A handler's try_handle_fresh(data) -> bytes | None, when present, answers fresh
+    cache hits inline. Other datagrams are queued to a fixed pool of worker tasks.
     """
 
     def __init__(self, config: UdpServerConfig, handler, metrics: Metrics | None = None):
         self.config = config
         self.handler = handler
         self.metrics = metrics
+        self._handle_wire = _wire_handler(handler)
+        self._try_handle_fresh = _fresh_handler(handler)
         self.transport: asyncio.DatagramTransport | None = None
         self.ready = asyncio.Event()
         self._stop_event = asyncio.Event()
+        self._queue: asyncio.Queue[tuple[bytes, object]] = asyncio.Queue()
+        # Datagrams queued or being handled; bounded by max_inflight.
+        self._pending = 0
+        self._workers: list[asyncio.Task] = []
+        # Per-datagram tasks, used instead of the pool when max_inflight <= 0.
         self._inflight: set[asyncio.Task] = set()
+        # Drop counts accumulated locally while running, flushed to metrics every
+        # _DROP_FLUSH_S so a flood costs an int increment per packet rather than
+        # two Metrics.inc calls and their dict updates.
+        self._drops_inflight = 0
+        self._drops_malformed = 0
+        self._drops_oversize = 0
+        self._flush_handle: asyncio.TimerHandle | None = None
 
     async def run(self) -> None:
         loop = asyncio.get_running_loop()
         self.transport, _ = await loop.create_datagram_endpoint(
-            lambda: self, local_addr=(self.config.host, self.config.port)
+            lambda: self,
+            local_addr=(self.config.host, self.config.port),
+            reuse_port=self.config.reuse_port,
         )
+        sock = self.transport.get_extra_info("socket")
+        if sock is not None:
+            _set_buffer_sizes(sock, self.config.rcvbuf_bytes, self.config.sndbuf_bytes)
+            if self.config.busy_poll_us > 0 and sys.platform.startswith("linux"):
+                _enable_busy_poll(sock, self.config.busy_poll_us)
+        # One worker per inflight slot, so a queued datagram never waits behind a slow one.
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(max(0, self.config.max_inflight))
+        ]
+        if self.metrics:
+            self._flush_handle = loop.call_later(_DROP_FLUSH_S, self._flush_tick)
         self.ready.set()
         logger.info("Listening on udp://%s:%d", self.config.host, self.config.port)
 
@@ -73,46 +180,106 @@ class UdpDnsServer(asyncio.DatagramProtocol):
             self._cancel_tasks()
             if self.transport:
                 self.transport.close()
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            self._flush_drops()
 
     def datagram_received(self, data: bytes, addr):
-        if self.config.max_inflight > 0 and len(self._inflight) >= self.config.max_inflight:
-            if self.metrics:
-                self.metrics.inc("dropped_total")
-                self.metrics.inc("dropped_max_inflight_total")
+        if self.config.max_inflight > 0 and self._pending >= self.config.max_inflight:
+            self._drops_inflight += 1
+            if self._flush_handle is None:
+                self._flush_drops()
+            return
+        if not _is_query(data):
+            logger.debug("Rejected non-query packet from %s", addr)
+            self._count_malformed()
             return
-        task = asyncio.create_task(self._handle_datagram(data, addr))
+        try:
+            wire = self._try_handle_fresh(data)
+            if wire is not None:
+                self._send_reply(wire, addr)
+                return
+        except Exception:
+            logger.exception("Handler failed for %s", addr)
+            return
+        self._pending += 1
+        if self._workers:
+            self._queue.put_nowait((data, addr))
+            return
+        task = asyncio.create_task(self._handle_unbounded(data, addr))
         self._inflight.add(task)
         task.add_done_callback(self._inflight.discard)
 
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            data, addr = await queue.get()
+            try:
+                await self._handle_datagram(data, addr)
+            finally:
+                self._pending -= 1
+                queue.task_done()
+
+    async def _handle_unbounded(self, data: bytes, addr) -> None:
+        try:
+            await self._handle_datagram(data, addr)
+        finally:
+            self._pending -= 1
+
     async def _handle_datagram(self, data: bytes, addr):
         try:
             req = DNSRecord.parse(data)
         except Exception:
             logger.debug("Invalid DNS packet from %s", addr)
-            if self.metrics:
-                self.metrics.inc("malformed_total")
-                self.metrics.inc("dropped_malformed_total")
+            self._count_malformed()
             return
 
         try:
-            resp = await self.handler.handle(req, addr)
-            if self.transport:
-                wire = resp.pack()
-                if self.config.max_udp_payload > 0 and len(wire) > self.config.max_udp_payload:
-                    resp.header.tc = 1
-                    resp.rr = []
-                    resp.auth = []
-                    resp.ar = []
-                    wire = resp.pack()
-                    if len(wire) > self.config.max_udp_payload:
-                        if self.metrics:
-                            self.metrics.inc("dropped_total")
-                            self.metrics.inc("dropped_oversize_total")
-                        return
-                self.transport.sendto(wire, addr)
+            wire = await self._handle_wire(req, addr)
+            self._send_reply(wire, addr)
         except Exception:
             logger.exception("Handler failed for %s", addr)
 
+    def _send_reply(self, wire: bytes, addr) -> None:
+        if not self.transport:
+            return
+        if self.config.max_udp_payload > 0 and len(wire) > self.config.max_udp_payload:
+            wire = truncate(wire)
+            if len(wire) > self.config.max_udp_payload:
+                self._drops_oversize += 1
+                if self._flush_handle is None:
+                    self._flush_drops()
+                return
+        self.transport.sendto(wire, addr)
+
+    def _count_malformed(self) -> None:
+        self._drops_malformed += 1
+        if self._flush_handle is None:
+            self._flush_drops()
+
+    def _flush_tick(self) -> None:
+        self._flush_drops()
+        self._flush_handle = asyncio.get_running_loop().call_later(_DROP_FLUSH_S, self._flush_tick)
+
+    def _flush_drops(self) -> None:
+        metrics = self.metrics
+        if not metrics:
+            self._drops_inflight = self._drops_malformed = self._drops_oversize = 0
+            return
+        if self._drops_inflight:
+            metrics.inc("dropped_total", self._drops_inflight)
+            metrics.inc("dropped_max_inflight_total", self._drops_inflight)
+            self._drops_inflight = 0
+        if self._drops_malformed:
+            metrics.inc("malformed_total", self._drops_malformed)
+            metrics.inc("dropped_malformed_total", self._drops_malformed)
+            self._drops_malformed = 0
+        if self._drops_oversize:
+            metrics.inc("dropped_total", self._drops_oversize)
+            metrics.inc("dropped_oversize_total", self._drops_oversize)
+            self._drops_oversize = 0
+
     def stop(self) -> None:
         if not self._stop_event.is_set():
             self._stop_event.set()
@@ -120,12 +287,35 @@ class UdpDnsServer(asyncio.DatagramProtocol):
             self.transport.close()
 
     def _cancel_tasks(self) -> None:
-        for task in list(self._inflight):
-            if not task.done():
-                task.cancel()
+        for task in (*self._workers, *self._inflight):
+            task.cancel()
+        self._workers.clear()
         self._inflight.clear()
 
 
+def _http_prologue(status_code: int, content_type: str) -> bytes:
+    # Everything up to the Content-Length value; the body length is appended per response.
+    reason = {200: "OK", 503: "Service Unavailable"}.get(status_code, "Not Found")
+    return (
+        f"HTTP/1.1 {status_code} {reason}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        "Connection: close\r\n"
+        "Content-Length: "
+    ).encode("ascii")
+
+
+_HTTP_PROLOGUES: dict[tuple[int, str], bytes] = {
+    key: _http_prologue(*key)
+    for key in (
+        (200, "text/plain"),
+        (200, "application/json"),
+        (404, "text/plain"),
+        (500, "text/plain"),
+        (503, "text/plain"),
+    )
+}
+
+
 @dataclass(frozen=True)
 class HttpMetricsConfig:
     host: str = "127.0.0.1"
@@ -243,38 +433,68 @@ class HttpMetricsServer:
     async def _send_response(
         self, writer: asyncio.StreamWriter, status_code: int, body: bytes, content_type: str
     ) -> None:
-        if status_code == 200:
-            reason = "OK"
-        elif status_code == 503:
-            reason = "Service Unavailable"
-        else:
-            reason = "Not Found"
-        headers = [
-            f"HTTP/1.1 {status_code} {reason}",
-            f"Content-Type: {content_type}",
-            f"Content-Length: {len(body)}",
-            "Connection: close",
-            "",
-            "",
-        ]
-        writer.write("\r\n".join(headers).encode("ascii") + body)
+        prologue = _HTTP_PROLOGUES.get((status_code, content_type))
+        if prologue is None:
+            prologue = _http_prologue(status_code, content_type)
+        writer.write(b"%s%d\r\n\r\n%s" % (prologue, len(body), body))
         await writer.drain()
         writer.close()
         await writer.wait_closed()
 
 
+class _ReadDeadline:
+    """
+    Per-connection read timeout: one timer that cancels the reading task when it
+    fires, armed before each read. Cheaper than wrapping every read in wait_for().
+    """
+
+    __slots__ = ("_loop", "_task", "_handle", "expired")
+
+    def __init__(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._handle: asyncio.TimerHandle | None = None
+        self.expired = False
+
+    def arm(self, timeout_s: float) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = self._loop.call_later(timeout_s, self._fire)
+
+    def disarm(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def uncancel(self) -> None:
+        # Python 3.11+ counts cancellation requests; clear ours once it is handled.
+        uncancel = getattr(self._task, "uncancel", None)
+        if uncancel is not None:
+            uncancel()
+
+    def _fire(self) -> None:
+        self._handle = None
+        self.expired = True
+        if self._task is not None:
+            self._task.cancel()
+
+
 class TcpDnsServer:
     """
     Async TCP DNS server with length-prefixed framing.
 
     handler signature:
         async def handle(request: DNSRecord, client_addr) -> DNSRecord
+    If the handler also provides handle_wire() returning reply bytes, it is preferred,
+    and try_handle_fresh(data) answers fresh cache hits without a per-request task.
     """
 
     def __init__(self, config: TcpServerConfig, handler, metrics: Metrics | None = None):
         self.config = config
         self.handler = handler
         self.metrics = metrics
+        self._handle_wire = _wire_handler(handler)
+        self._try_handle_fresh = _fresh_handler(handler)
         self.ready = asyncio.Event()
         self._stop_event = asyncio.Event()
         self._inflight: set[asyncio.Task] = set()
@@ -282,8 +502,13 @@ class TcpDnsServer:
 
     async def run(self) -> None:
         self._server = await asyncio.start_server(
-            self._handle_client, host=self.config.host, port=self.config.port
+            self._handle_client,
+            host=self.config.host,
+            port=self.config.port,
+            reuse_port=self.config.reuse_port,
         )
+        for sock in self._server.sockets:
+            _set_buffer_sizes(sock, self.config.rcvbuf_bytes, self.config.sndbuf_bytes)
         self.ready.set()
         logger.info("Listening on tcp://%s:%d", self.config.host, self.config.port)
 
@@ -305,32 +530,32 @@ class TcpDnsServer:
         self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
     ) -> None:
         peer = writer.get_extra_info("peername")
+        # Requests on one connection run concurrently (RFC 7766 pipelining); replies
+        # go out in completion order, one whole frame per write under write_lock.
+        write_lock = asyncio.Lock()
+        pending: set[asyncio.Task] = set()
+        deadline = _ReadDeadline()
         try:
             while True:
+                deadline.arm(self.config.idle_timeout_s)
                 try:
-                    length_bytes = await asyncio.wait_for(
-                        reader.readexactly(2), timeout=self.config.idle_timeout_s
-                    )
-                except asyncio.TimeoutError:
-                    return
+                    length_bytes = await reader.readexactly(2)
                 except asyncio.IncompleteReadError:
                     return
 
-                msg_len = int.from_bytes(length_bytes, "big")
+                (msg_len,) = _LEN_PREFIX.unpack(length_bytes)
                 if self.config.max_message_size > 0 and msg_len > self.config.max_message_size:
                     if self.metrics:
                         self.metrics.inc("dropped_total")
                         self.metrics.inc("dropped_oversize_total")
                     return
 
+                deadline.arm(self.config.read_timeout_s)
                 try:
-                    data = await asyncio.wait_for(
-                        reader.readexactly(msg_len), timeout=self.config.read_timeout_s
-                    )
-                except asyncio.TimeoutError:
-                    return
+                    data = await reader.readexactly(msg_len)
                 except asyncio.IncompleteReadError:
                     return
+                deadline.disarm()
 
                 if self.config.max_inflight > 0 and len(self._inflight) >= self.config.max_inflight:
                     if self.metrics:
@@ -338,37 +563,66 @@ class TcpDnsServer:
                         self.metrics.inc("dropped_max_inflight_total")
                     return
 
-                task = asyncio.create_task(self._handle_request(data, peer, writer))
+                if not _is_query(data):
+                    logger.debug("Rejected non-query packet from %s", peer)
+                    _count_malformed(self.metrics)
+                    continue
+
+                try:
+                    wire = self._try_handle_fresh(data)
+                    if wire is not None:
+                        await self._write_reply(writer, write_lock, wire)
+                        continue
+                except Exception:
+                    logger.exception("Handler failed for %s", peer)
+                    continue
+
+                task = asyncio.create_task(self._handle_request(data, peer, writer, write_lock))
                 self._inflight.add(task)
                 task.add_done_callback(self._inflight.discard)
-                await task
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except asyncio.CancelledError:
+            if not deadline.expired:
+                raise
+            deadline.uncancel()
         finally:
+            deadline.disarm()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
             writer.close()
             await writer.wait_closed()
 
-    async def _handle_request(self, data: bytes, peer, writer: asyncio.StreamWriter) -> None:
+    async def _handle_request(
+        self, data: bytes, peer, writer: asyncio.StreamWriter, write_lock: asyncio.Lock
+    ) -> None:
         try:
             req = DNSRecord.parse(data)
         except Exception:
             logger.debug("Invalid DNS packet from %s", peer)
-            if self.metrics:
-                self.metrics.inc("malformed_total")
-                self.metrics.inc("dropped_malformed_total")
+            _count_malformed(self.metrics)
             return
 
         try:
-            resp = await self.handler.handle(req, peer)
-            wire = resp.pack()
-            if self.config.max_message_size > 0 and len(wire) > self.config.max_message_size:
-                if self.metrics:
-                    self.metrics.inc("dropped_total")
-                    self.metrics.inc("dropped_oversize_total")
-                return
-            writer.write(len(wire).to_bytes(2, "big") + wire)
-            await writer.drain()
+            wire = await self._handle_wire(req, peer)
+            await self._write_reply(writer, write_lock, wire)
         except Exception:
             logger.exception("Handler failed for %s", peer)
 
+    async def _write_reply(
+        self, writer: asyncio.StreamWriter, write_lock: asyncio.Lock, wire: bytes
+    ) -> None:
+        if self.config.max_message_size > 0 and len(wire) > self.config.max_message_size:
+            if self.metrics:
+                self.metrics.inc("dropped_total")
+                self.metrics.inc("dropped_oversize_total")
+            return
+        async with write_lock:
+            # writelines lets the transport send prefix and body without joining them
+            # (vectored send on Python 3.12+).
+            writer.writelines((_LEN_PREFIX.pack(len(wire)), wire))
+            await writer.drain()
+
     def _cancel_tasks(self) -> None:
         for task in list(self._inflight):
             if not task.done():
@@ -1,6 +1,6 @@
 import asyncio
 from collections.abc import Awaitable, Callable, Hashable
-from typing import TypeVar
+from typing import Any, TypeVar
 
 from resilientdns.metrics import Metrics
 
@@ -12,30 +12,30 @@ class SingleFlight:
     Deduplicate concurrent work per key.
     First caller becomes leader and creates the task; others join the same task.
     The task is removed when it completes (success, error, or cancel).
+
+    Not thread-safe: all calls must come from the event loop thread. Nothing in
+    get_or_create awaits, so no lock is needed between coroutines.
     """
 
     def __init__(self, metrics: Metrics | None = None) -> None:
         self.metrics = metrics
-        self._lock = asyncio.Lock()
         self._tasks: dict[Hashable, asyncio.Task] = {}
 
-    async def get_or_create(
-        self, key: Hashable, factory: Callable[[], Awaitable[T]]
+    def get_or_create(
+        self, key: Hashable, factory: Callable[..., Awaitable[T]], *args: Any
     ) -> tuple[asyncio.Task, bool]:
-        async with self._lock:
-            existing = self._tasks.get(key)
-            if existing is not None and not existing.done():
-                if self.metrics:
-                    self.metrics.inc("singleflight_dedup_total")
-                return existing, False
-
-            task = asyncio.create_task(factory())
-            self._tasks[key] = task
-            task.add_done_callback(lambda _t: asyncio.create_task(self._cleanup(key, _t)))
-            return task, True
-
-    async def _cleanup(self, key: Hashable, task: asyncio.Task) -> None:
-        async with self._lock:
-            current = self._tasks.get(key)
-            if current is task:
-                self._tasks.pop(key, None)
+        """Join the running task for key, or start factory(*args) as the leader."""
+        existing = self._tasks.get(key)
+        if existing is not None and not existing.done():
+            if self.metrics:
+                self.metrics.inc("singleflight_dedup_total")
+            return existing, False
+
+        task = asyncio.create_task(factory(*args))
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._cleanup(key, t))
+        return task, True
+
+    def _cleanup(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
@@ -0,0 +1,118 @@
+import struct
+
+_U16 = struct.Struct(">H")
+_HEADER = struct.Struct(">HHHHHH")
+_TTL_RDLENGTH = struct.Struct(">IH")
+_HEADER_LEN = 12
+_QDCOUNT = struct.Struct(">H")
+_QTYPE_QCLASS = struct.Struct(">HH")
+_FLAGS_QDCOUNT = struct.Struct(">HH")
+_FLAG_TC = 0x0200
+# dnslib prints label bytes 33..126 as-is and escapes everything else as \DDD.
+_PRINTABLE = bytes(range(33, 127))
+
+
+def with_txid(wire: bytes, txid: int) -> bytes:
+    """Return wire with its 16-bit transaction ID replaced."""
+    return _U16.pack(txid) + memoryview(wire)[2:]
+
+
+def skip_name(buf: bytes, pos: int) -> int:
+    """Return the offset just past the (possibly compressed) name at pos."""
+    end = len(buf)
+    while True:
+        if pos >= end:
+            raise ValueError("truncated name")
+        length = buf[pos]
+        if length == 0:
+            return pos + 1
+        if length & 0xC0 == 0xC0:
+            return pos + 2
+        if length & 0xC0:
+            raise ValueError("unsupported label type")
+        pos += length + 1
+
+
+def truncate(buf: bytes) -> bytes:
+    """
+    Header and question section of a reply, with TC set and all record sections
+    dropped, copied from the wire without a parse/pack round trip. Raises ValueError
+    on a malformed or truncated message.
+    """
+    if len(buf) < _HEADER_LEN:
+        raise ValueError("short header")
+    flags, qdcount = _FLAGS_QDCOUNT.unpack_from(buf, 2)
+    pos = _HEADER_LEN
+    for _ in range(qdcount):
+        pos = skip_name(buf, pos) + 4  # QTYPE + QCLASS
+    if pos > len(buf):
+        raise ValueError("truncated question")
+    header = _HEADER.pack(_U16.unpack_from(buf)[0], flags | _FLAG_TC, qdcount, 0, 0, 0)
+    return header + memoryview(buf)[_HEADER_LEN:pos]
+
+
+def min_answer_ttl(buf: bytes) -> int | None:
+    """
+    Minimum TTL over the answer section of a DNS message, read straight from
+    the wire. Returns None when there are no answers; raises ValueError on a
+    malformed or truncated message.
+    """
+    if len(buf) < _HEADER_LEN:
+        raise ValueError("short header")
+    _id, _flags, qdcount, ancount, _nscount, _arcount = _HEADER.unpack_from(buf)
+    if ancount == 0:
+        return None
+
+    pos = _HEADER_LEN
+    for _ in range(qdcount):
+        pos = skip_name(buf, pos) + 4  # QTYPE + QCLASS
+
+    best: int | None = None
+    end = len(buf)
+    for _ in range(ancount):
+        pos = skip_name(buf, pos)
+        if pos + 10 > end:
+            raise ValueError("truncated resource record")
+        # TYPE(2) CLASS(2) TTL(4) RDLENGTH(2)
+        ttl, rdlength = _TTL_RDLENGTH.unpack_from(buf, pos + 4)
+        pos += 10 + rdlength
+        if pos > end:
+            raise ValueError("truncated rdata")
+        if best is None or ttl < best:
+            best = ttl
+    return best
+
+
+def read_question(buf: bytes) -> tuple[str, int, int] | None:
+    """
+    Read the first question as (qname, qtype, qclass) without building a DNSRecord.
+    qname is normalized like the cache keys: lowercased, no trailing dot, labels
+    rendered the way dnslib prints them. Returns None when there is no plain
+    (uncompressed) question to read.
+    """
+    if len(buf) < _HEADER_LEN or _QDCOUNT.unpack_from(buf, 4)[0] == 0:
+        return None
+    labels = []
+    pos = _HEADER_LEN
+    end = len(buf)
+    while True:
+        if pos >= end:
+            return None
+        length = buf[pos]
+        if length == 0:
+            pos += 1
+            break
+        if length & 0xC0:
+            return None
+        labels.append(buf[pos + 1 : pos + 1 + length])
+        pos += length + 1
+    if pos + 4 > end:
+        return None
+    qtype, qclass = _QTYPE_QCLASS.unpack_from(buf, pos)
+    name = b".".join(labels)
+    if not name.translate(None, _PRINTABLE):
+        return name.decode("ascii").lower(), qtype, qclass
+    text = ".".join(
+        "".join(chr(c) if 33 <= c < 127 else f"\\{c:03d}" for c in label) for label in labels
+    )
+    return text.lower(), qtype, qclass
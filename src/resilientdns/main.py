@@ -1,13 +1,13 @@
 import argparse
 import asyncio
-import contextlib
+import dataclasses
 import logging
 import signal
 import sys
 from pathlib import Path
 
-from resilientdns.cache.memory import CacheConfig, MemoryDnsCache
-from resilientdns.config import Config, build_config, validate_config
+from resilientdns.cache.memory import CacheConfig, MemoryDnsCache, run_clock_ticker
+from resilientdns.config import Config, build_config
 from resilientdns.dns.handler import DnsHandler, HandlerConfig
 from resilientdns.dns.server import (
     HttpMetricsConfig,
@@ -18,13 +18,13 @@ from resilientdns.dns.server import (
     UdpDnsServer,
     UdpServerConfig,
 )
-from resilientdns.metrics import Metrics, format_stats, periodic_stats_reporter
+from resilientdns.metrics import Metrics, format_stats, start_stats_reporter
 from resilientdns.refresh_warmup import enqueue_warmup_file
-from resilientdns.relay_startup_check import run_relay_startup_check
 from resilientdns.relay_types import RelayConfig, RelayLimits
-from resilientdns.upstream.tcp_forwarder import TcpUpstreamForwarder, UpstreamTcpConfig
 from resilientdns.upstream.udp_forwarder import UdpUpstreamForwarder, UpstreamUdpConfig
 
+logger = logging.getLogger("resilientdns")
+
 
 def _setup_logging(verbose: bool) -> None:
     level = logging.DEBUG if verbose else logging.INFO
@@ -47,10 +47,7 @@ def _register_signal_handlers(loop, stop_fns, cache_clear_fn, logger) -> None:
 
     if hasattr(signal, "SIGHUP"):
         try:
-            loop.add_signal_handler(
-                signal.SIGHUP,
-                lambda: _handle_sighup(cache_clear_fn, logger),
-            )
+            loop.add_signal_handler(signal.SIGHUP, _handle_sighup, cache_clear_fn, logger)
         except NotImplementedError:
             pass
 
@@ -75,8 +72,61 @@ def _build_relay_config(cfg: Config) -> RelayConfig:
     )
 
 
+async def _quiet_cancel(task: asyncio.Task) -> None:
+    """Cancel task if it is still running and wait for it, swallowing the cancellation."""
+    if task.done():
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def _use_uvloop() -> None:
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Using uvloop event loop")
+
+
+async def _relay_startup_check(cfg: Config) -> None:
+    from resilientdns.relay_startup_check import run_relay_startup_check
+
+    relay_cfg = _build_relay_config(cfg)
+    await run_relay_startup_check(
+        relay_cfg=relay_cfg,
+        timeout_s=cfg.upstream_timeout_s,
+        client_limits=relay_cfg.limits,
+        mode=cfg.relay_startup_check,
+        logger=logger,
+    )
+
+
+async def _check_and_run(cfg: Config) -> None:
+    await _relay_startup_check(cfg)
+    await _run(cfg)
+
+
+def _worker_config(cfg: Config, index: int) -> Config:
+    # Workers share the DNS port; only the first one serves metrics.
+    return dataclasses.replace(
+        cfg,
+        listen_reuse_port=True,
+        metrics_port=cfg.metrics_port if index == 0 else 0,
+    )
+
+
+def _run_worker(cfg: Config, index: int) -> None:
+    from resilientdns.workers import pin_cpu
+
+    pin_cpu(index)
+    asyncio.run(_run(_worker_config(cfg, index)))
+
+
 async def _run(cfg: Config) -> None:
-    logger = logging.getLogger("resilientdns")
     metrics = Metrics()
     ready_state = ReadyState()
     if cfg.upstream_transport == "relay":
@@ -87,8 +137,12 @@ async def _run(cfg: Config) -> None:
             relay_cfg=relay_cfg,
             metrics=metrics,
             timeout_s=cfg.upstream_timeout_s,
+            max_conns=cfg.max_inflight,
+            batch_window_s=cfg.relay_batch_window_ms / 1000.0,
         )
     elif cfg.upstream_transport == "tcp":
+        from resilientdns.upstream.tcp_forwarder import TcpUpstreamForwarder, UpstreamTcpConfig
+
         upstream = TcpUpstreamForwarder(
             UpstreamTcpConfig(
                 host=cfg.upstream_host,
@@ -133,6 +187,7 @@ async def _run(cfg: Config) -> None:
             refresh_batch_size=cfg.refresh_batch_size,
             refresh_concurrency=cfg.refresh_concurrency,
             refresh_queue_max=cfg.refresh_queue_max,
+            parse_offload_min_bytes=cfg.parse_offload_min_bytes,
         ),
     )
     if cfg.refresh_warmup_enabled:
@@ -145,24 +200,21 @@ async def _run(cfg: Config) -> None:
             )
         except Exception as exc:
             raise SystemExit(f"failed to load warmup file: {exc}") from exc
-    udp_server = UdpDnsServer(
-        UdpServerConfig(
-            host=cfg.listen_host,
-            port=cfg.listen_port,
-            max_inflight=cfg.max_inflight,
-        ),
-        handler=handler,
-        metrics=metrics,
+    # Options both listeners take, kept in one place so UDP and TCP cannot drift apart.
+    listener = dict(
+        host=cfg.listen_host,
+        port=cfg.listen_port,
+        max_inflight=cfg.max_inflight,
+        rcvbuf_bytes=cfg.listen_rcvbuf_bytes,
+        sndbuf_bytes=cfg.listen_sndbuf_bytes,
+        reuse_port=cfg.listen_reuse_port,
     )
-    tcp_server = TcpDnsServer(
-        TcpServerConfig(
-            host=cfg.listen_host,
-            port=cfg.listen_port,
-            max_inflight=cfg.max_inflight,
-        ),
+    udp_server = UdpDnsServer(
+        UdpServerConfig(**listener, busy_poll_us=cfg.udp_busy_poll_us),
         handler=handler,
         metrics=metrics,
     )
+    tcp_server = TcpDnsServer(TcpServerConfig(**listener), handler=handler, metrics=metrics)
     metrics_server = None
     if cfg.metrics_port > 0:
         metrics_server = HttpMetricsServer(
@@ -178,6 +230,9 @@ async def _run(cfg: Config) -> None:
     _register_signal_handlers(loop, stop_fns, cache.clear, logger)
 
     async def wait_ready(server_task: asyncio.Task, ready: asyncio.Event) -> None:
+        if ready.is_set():
+            # Already listening; a later failure still surfaces through the wait below.
+            return
         ready_task = asyncio.create_task(ready.wait())
         try:
             done, _ = await asyncio.wait(
@@ -186,15 +241,13 @@ async def _run(cfg: Config) -> None:
             if server_task in done:
                 await server_task
         finally:
-            if not ready_task.done():
-                ready_task.cancel()
-                with contextlib.suppress(asyncio.CancelledError):
-                    await ready_task
+            await _quiet_cancel(ready_task)
 
+    clock_task = asyncio.create_task(run_clock_ticker())
     udp_task = asyncio.create_task(udp_server.run())
     tcp_task = asyncio.create_task(tcp_server.run())
     metrics_task = asyncio.create_task(metrics_server.run()) if metrics_server else None
-    reporter_task = None
+    stop_reporter = None
     refresh_tasks = []
 
     try:
@@ -203,18 +256,19 @@ async def _run(cfg: Config) -> None:
         if metrics_server and metrics_task:
             await wait_ready(metrics_task, metrics_server.ready)
         ready_state.set_ready()
-        reporter_task = asyncio.create_task(periodic_stats_reporter(metrics))
+        stop_reporter = start_stats_reporter(metrics)
         refresh_tasks = handler.start_refresh_tasks()
         tasks = [udp_task, tcp_task]
         if metrics_task:
             tasks.append(metrics_task)
-        await asyncio.gather(*tasks)
+        # One listener exiting (cleanly or not) tears the rest down in the finally below.
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
     finally:
         logger.info("Shutting down...")
-        if reporter_task:
-            reporter_task.cancel()
-            with contextlib.suppress(asyncio.CancelledError):
-                await reporter_task
+        if stop_reporter:
+            stop_reporter()
         if refresh_tasks:
             await handler.stop_refresh_tasks()
         for fn in stop_fns:
@@ -222,11 +276,9 @@ async def _run(cfg: Config) -> None:
         tasks = [udp_task, tcp_task]
         if metrics_task:
             tasks.append(metrics_task)
-        for task in tasks:
-            if not task.done():
-                task.cancel()
-                with contextlib.suppress(asyncio.CancelledError):
-                    await task
+        await asyncio.gather(*(_quiet_cancel(task) for task in tasks), return_exceptions=True)
+        await _quiet_cancel(clock_task)
+        handler.close()
         close_fn = getattr(upstream, "close", None)
         if callable(close_fn):
             result = close_fn()
@@ -249,6 +301,30 @@ def main() -> None:
     parser.add_argument("--max-inflight", type=int, default=256)
     parser.add_argument("--metrics-host", default="127.0.0.1")
     parser.add_argument("--metrics-port", type=int, default=0)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Server processes sharing the listen port via SO_REUSEPORT (POSIX only)",
+    )
+    parser.add_argument(
+        "--listen-rcvbuf",
+        type=int,
+        default=0,
+        help="SO_RCVBUF bytes for the UDP/TCP listeners (0 = kernel default)",
+    )
+    parser.add_argument(
+        "--listen-sndbuf",
+        type=int,
+        default=0,
+        help="SO_SNDBUF bytes for the UDP/TCP listeners (0 = kernel default)",
+    )
+    parser.add_argument(
+        "--udp-busy-poll-us",
+        type=int,
+        default=0,
+        help="SO_BUSY_POLL microseconds for the UDP listener, Linux only (0 = off)",
+    )
 
     # Upstream DNS (temporary)
     parser.add_argument(
@@ -273,6 +349,12 @@ def main() -> None:
     parser.add_argument("--relay-max-request-bytes", type=int, default=65536)
     parser.add_argument("--relay-per-item-max-wire-bytes", type=int, default=4096)
     parser.add_argument("--relay-max-response-bytes", type=int, default=262144)
+    parser.add_argument(
+        "--relay-batch-window-ms",
+        type=float,
+        default=0.0,
+        help="Coalesce relay queries arriving within this window into one request (0 = off)",
+    )
 
     # Cache tuning
     parser.add_argument(
@@ -287,6 +369,12 @@ def main() -> None:
         default=60,
         help="TTL (seconds) for negative cache entries",
     )
+    parser.add_argument(
+        "--parse-offload-min-bytes",
+        type=int,
+        default=0,
+        help="Parse upstream responses of at least this size in a worker thread (0 = off)",
+    )
     parser.add_argument("--refresh-enabled", action="store_true")
     parser.add_argument("--refresh-ahead-seconds", type=int, default=30)
     parser.add_argument("--refresh-popularity-threshold", type=int, default=5)
@@ -317,28 +405,24 @@ def main() -> None:
 
     args = parser.parse_args()
 
-    cfg = build_config(args)
     try:
-        validate_config(cfg)
+        cfg = build_config(args)
     except ValueError as exc:
         print(str(exc), file=sys.stderr)
         raise SystemExit(1) from exc
 
     _setup_logging(cfg.verbose)
-    logger = logging.getLogger("resilientdns")
+    _use_uvloop()
 
-    if cfg.upstream_transport == "relay" and cfg.relay_startup_check != "off":
-        relay_cfg = _build_relay_config(cfg)
-        asyncio.run(
-            run_relay_startup_check(
-                relay_cfg=relay_cfg,
-                timeout_s=cfg.upstream_timeout_s,
-                client_limits=relay_cfg.limits,
-                mode=cfg.relay_startup_check,
-                logger=logger,
-            )
-        )
-    asyncio.run(_run(cfg))
+    startup_check = cfg.upstream_transport == "relay" and cfg.relay_startup_check != "off"
+    if cfg.workers > 1:
+        from resilientdns.workers import run_workers
+
+        # The check needs its own loop here: it must be closed before the parent forks.
+        if startup_check:
+            asyncio.run(_relay_startup_check(cfg))
+        raise SystemExit(run_workers(cfg.workers, lambda index: _run_worker(cfg, index)))
+    asyncio.run(_check_and_run(cfg) if startup_check else _run(cfg))
 
 
 if __name__ == "__main__":
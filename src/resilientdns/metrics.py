@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-import asyncio
 import logging
-from collections.abc import Mapping
-from threading import Lock
+from collections import deque
+from collections.abc import Callable, Mapping
+from threading import Event, Thread, get_ident
 
 logger = logging.getLogger("resilientdns")
 
@@ -23,6 +23,11 @@ _STATS_FIELDS = (
     ("evictions", "evictions_total"),
 )
 
+# The STATS line layout is fixed, so build its format string once.
+_STATS_TEMPLATE = "STATS " + " ".join(f"{label}=%s" for label, _key in _STATS_FIELDS)
+_STATS_KEYS = tuple(key for _label, key in _STATS_FIELDS)
+_STATS_ZEROS = (0,) * len(_STATS_FIELDS)
+
 WARMUP_METRIC_KEYS = (
     "cache_refresh_warmup_loaded_total",
     "cache_refresh_warmup_invalid_lines_total",
@@ -30,35 +35,104 @@ WARMUP_METRIC_KEYS = (
 
 
 class Metrics:
+    """
+    Counter store owned by the thread that created it (the event loop thread).
+
+    The owner updates the dict directly, without a lock: only the owner ever writes
+    it. Other threads (e.g. executor workers) append their updates to a deque, which
+    is thread-safe, and the owner folds them in on its next update or read. Create it
+    on the event loop thread.
+    """
+
     def __init__(self) -> None:
-        self._lock = Lock()
+        self._owner = get_ident()
         self._counters: dict[str, int] = {}
+        # (key, value, is_set) updates from non-owner threads, applied by the owner.
+        self._foreign: deque[tuple[str, int, bool]] = deque()
 
     def inc(self, key: str, by: int = 1) -> None:
-        with self._lock:
-            self._counters[key] = self._counters.get(key, 0) + int(by)
+        if get_ident() == self._owner:
+            if self._foreign:
+                self._drain()
+            counters = self._counters
+            counters[key] = counters.get(key, 0) + by
+        else:
+            self._foreign.append((key, by, False))
+
+    def counter(self, key: str) -> Callable[[], None]:
+        """Return a zero-argument incrementer for key, bound once for hot paths."""
+        owner = self._owner
+        counters = self._counters
+        get = counters.get
+        foreign = self._foreign
+
+        def inc() -> None:
+            if get_ident() == owner:
+                if foreign:
+                    self._drain()
+                counters[key] = get(key, 0) + 1
+            else:
+                foreign.append((key, 1, False))
+
+        return inc
 
     def set(self, key: str, value: int) -> None:
-        with self._lock:
+        if get_ident() == self._owner:
+            if self._foreign:
+                self._drain()
             self._counters[key] = int(value)
+        else:
+            self._foreign.append((key, int(value), True))
+
+    def get(self, key: str, default: int = 0) -> int:
+        return self._view().get(key, default)
 
     def snapshot(self) -> dict[str, int]:
-        with self._lock:
-            return dict(self._counters)
+        return dict(self._view())
+
+    def _view(self) -> dict[str, int]:
+        if get_ident() == self._owner:
+            self._drain()
+            return self._counters
+        # Off the owner thread: fold pending updates into a private copy. Updates the
+        # owner drains between the two copies are missed, so this read may lag briefly.
+        view = dict(self._counters)
+        self._apply(view, list(self._foreign))
+        return view
+
+    def _drain(self) -> None:
+        foreign = self._foreign
+        # popleft() is atomic, so appends racing with the drain are never lost.
+        self._apply(self._counters, [foreign.popleft() for _ in range(len(foreign))])
+
+    @staticmethod
+    def _apply(counters: dict[str, int], updates: list[tuple[str, int, bool]]) -> None:
+        for key, value, is_set in updates:
+            counters[key] = value if is_set else counters.get(key, 0) + value
 
 
 def format_stats(snapshot: Mapping[str, int]) -> str:
-    parts = [f"{label}={snapshot.get(key, 0)}" for label, key in _STATS_FIELDS]
-    return f"STATS {' '.join(parts)}"
+    return _STATS_TEMPLATE % tuple(map(snapshot.get, _STATS_KEYS, _STATS_ZEROS))
+
+
+def start_stats_reporter(metrics: Metrics, interval_s: float = 30.0) -> Callable[[], None]:
+    """
+    Log STATS every interval_s from a daemon thread, keeping the formatting off the
+    event loop. Returns a function that stops the thread and waits for it.
+    """
+    stop = Event()
+
+    def run() -> None:
+        while not stop.wait(interval_s):
+            snapshot = metrics.snapshot()
+            if any(snapshot.values()):
+                logger.info(format_stats(snapshot))
 
+    thread = Thread(target=run, name="resilientdns-stats", daemon=True)
+    thread.start()
 
-async def periodic_stats_reporter(metrics: Metrics | None, interval_s: float = 30.0) -> None:
-    if metrics is None:
-        return
+    def stop_reporter() -> None:
+        stop.set()
+        thread.join(timeout=2.0)
 
-    while True:
-        await asyncio.sleep(interval_s)
-        snapshot = metrics.snapshot()
-        if not any(snapshot.values()):
-            continue
-        logger.info(format_stats(snapshot))
+    return stop_reporter
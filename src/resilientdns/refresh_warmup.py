@@ -7,6 +7,12 @@ from dnslib import CLASS, QTYPE
 
 WarmupItem = tuple[str, int, int]
 
+# Every spelling of a qtype seen in practice ("AAAA", "aaaa", "28") in one table;
+# _parse_qtype falls back to upper-casing and to zero-padded digits.
+_QTYPE_IDS: dict[str, int] = {
+    key: code for code, name in QTYPE.forward.items() for key in (name, name.lower(), str(code))
+}
+
 
 def parse_warmup_source(source: str | Path) -> tuple[list[WarmupItem], int]:
     if isinstance(source, Path):
@@ -15,25 +21,28 @@ def parse_warmup_source(source: str | Path) -> tuple[list[WarmupItem], int]:
         text = source
 
     items: list[WarmupItem] = []
+    append = items.append
+    qtype_ids = _QTYPE_IDS
+    qclass = CLASS.IN
     invalid = 0
-    for raw_line in text.splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#"):
-            continue
+    for line in text.splitlines():
+        # split() also strips, so blank lines give [] and comments start parts[0].
         parts = line.split()
+        if not parts:
+            continue
         if len(parts) != 2:
-            invalid += 1
+            if parts[0][0] != "#":
+                invalid += 1
             continue
         qname_raw, qtype_raw = parts
-        qname = _normalize_qname(qname_raw)
-        if not qname:
-            invalid += 1
+        if qname_raw[0] == "#":
             continue
-        qtype_id = _parse_qtype(qtype_raw)
-        if qtype_id is None:
+        qname = qname_raw.rstrip(".").lower()
+        qtype_id = qtype_ids.get(qtype_raw) or _parse_qtype(qtype_raw)
+        if not qname or qtype_id is None:
             invalid += 1
             continue
-        items.append((qname, qtype_id, CLASS.IN))
+        append((qname, qtype_id, qclass))
     return items, invalid
 
 
@@ -56,14 +65,11 @@ def enqueue_warmup_file(
     return loaded, invalid, enqueued
 
 
-def _normalize_qname(qname: str) -> str:
-    return qname.strip().rstrip(".").lower()
-
-
 def _parse_qtype(token: str) -> int | None:
-    if token.isdigit():
-        qtype_id = int(token)
-        if qtype_id in QTYPE.forward:
-            return qtype_id
-        return None
-    return QTYPE.reverse.get(token.upper())
+    # No qtype code is 0, so a falsy lookup always means a miss.
+    qtype_id = _QTYPE_IDS.get(token) or _QTYPE_IDS.get(token.upper())
+    if qtype_id is None and token.isdigit():
+        qtype_id = int(token)  # zero-padded codes such as "0028"
+        if qtype_id not in QTYPE.forward:
+            return None
+    return qtype_id
@@ -1,33 +1,137 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 import json
+import re
+import sys
+from binascii import a2b_base64, b2a_base64
 from typing import Any
 
 import aiohttp
 
 from resilientdns.metrics import Metrics
-from resilientdns.relay_types import (
-    RelayConfig,
-    RelayDnsItemRequest,
-    RelayDnsRequest,
-    RelayDnsResponse,
-)
+from resilientdns.relay_types import RelayConfig, RelayDnsItemResponse, RelayDnsResponse
+
+try:  # optional "speedups" extra: SIMD base64
+    from pybase64 import b64decode as _pybase64_decode
+    from pybase64 import b64encode as _b64encode
+
+    def _b64decode(data: str | bytes) -> bytes:
+        return _pybase64_decode(data, validate=True)
+
+except ImportError:
+
+    def _b64encode(data: bytes) -> bytes:
+        return b2a_base64(data, newline=False)
+
+    if sys.version_info >= (3, 11):
+
+        def _b64decode(data: str | bytes) -> bytes:
+            return a2b_base64(data, strict_mode=True)
+
+    else:
+        # Same check b64decode(validate=True) runs, without its per-call re lookup.
+        _B64_RE = re.compile(rb"[A-Za-z0-9+/]*={0,2}")
+
+        def _b64decode(data: str | bytes) -> bytes:
+            if isinstance(data, str):
+                data = data.encode("ascii")
+            if _B64_RE.fullmatch(data) is None:
+                raise ValueError("Non-base64 digit found")
+            return a2b_base64(data)
+
+
+try:  # optional "speedups" extra
+    from orjson import dumps as _json_dumps
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+# Single-item request envelope split around its two variable parts. Request ids that
+# need no JSON escaping (the handler's are digits) are spliced in directly.
+_ENVELOPE_HEAD = b'{"v":1,"id":"'
+_ENVELOPE_MID = b'","items":[{"id":"0","q":"'
+_ENVELOPE_TAIL = b'"}]}'
+_PLAIN_ID = re.compile(r"[A-Za-z0-9._:-]*").fullmatch
+
+
+def _encode_request(request_id: str, wire_query: bytes) -> bytes:
+    """JSON body for a one-item relay request; RelayDnsRequest.to_dict() in compact form."""
+    q = _b64encode(wire_query)
+    if _PLAIN_ID(request_id):
+        return b"".join(
+            (_ENVELOPE_HEAD, request_id.encode("ascii"), _ENVELOPE_MID, q, _ENVELOPE_TAIL)
+        )
+    return _json_dumps({"v": 1, "id": request_id, "items": [{"id": "0", "q": q.decode("ascii")}]})
+
+
+def _encode_batch(request_id: str, wire_queries: list[bytes]) -> bytes:
+    """JSON body for a multi-item relay request; items are numbered "0", "1", ..."""
+    qs = [_b64encode(wire) for wire in wire_queries]
+    if _PLAIN_ID(request_id):
+        items = b",".join(b'{"id":"%d","q":"%s"}' % (index, q) for index, q in enumerate(qs))
+        return b"".join((_ENVELOPE_HEAD, request_id.encode("ascii"), b'","items":[', items, b"]}"))
+    items = [{"id": str(index), "q": q.decode("ascii")} for index, q in enumerate(qs)]
+    return _json_dumps({"v": 1, "id": request_id, "items": items})
 
 
 class RelayUpstreamForwarder:
-    def __init__(self, relay_cfg: RelayConfig, metrics: Metrics | None, timeout_s: float) -> None:
+    def __init__(
+        self,
+        relay_cfg: RelayConfig,
+        metrics: Metrics | None,
+        timeout_s: float,
+        max_conns: int = 100,
+        batch_window_s: float = 0.0,
+    ) -> None:
         self.relay_cfg = relay_cfg
         self.metrics = metrics
         self._timeout = aiohttp.ClientTimeout(total=timeout_s)
-        self._session = aiohttp.ClientSession(timeout=self._timeout)
+        # One relay host: let it have every connection, keep them warm between bursts and
+        # skip re-resolving its name every 10 s (aiohttp's default DNS cache TTL).
+        connector = aiohttp.TCPConnector(
+            limit=max_conns,
+            limit_per_host=max_conns,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
         self._closed = False
+        self._dns_url = relay_cfg.dns_url
+        self._headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip",
+        }
+        if relay_cfg.auth_token:
+            self._headers["Authorization"] = f"Bearer {relay_cfg.auth_token}"
+        # Micro-batching (off when 0): queries arriving within batch_window_s of the first
+        # one share a single POST of up to limits.max_items items.
+        self._batch_window_s = batch_window_s
+        self._batch: list[tuple[str, bytes, asyncio.Future]] = []
+        self._batch_timer: asyncio.TimerHandle | None = None
+        self._batch_tasks: set[asyncio.Task] = set()
 
     async def close(self) -> None:
         if self._closed:
             return
         self._closed = True
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        batch, self._batch = self._batch, []
+        for _request_id, _wire, fut in batch:
+            if not fut.done():
+                fut.set_result(None)
+        # Batches already posting must finish unwinding before their session goes away.
+        tasks = list(self._batch_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
         await self._session.close()
 
     async def query(self, wire_query: bytes, *, request_id: str) -> bytes | None:
@@ -36,45 +140,127 @@ class RelayUpstreamForwarder:
 
         limits = self.relay_cfg.limits
         if len(wire_query) > limits.per_item_max_wire_bytes:
-            if self.metrics:
-                self.metrics.inc("dropped_total")
-                self.metrics.inc("dropped_oversize_total")
+            self._count_oversize()
             return None
 
-        payload = RelayDnsRequest(
-            v=1,
-            id=request_id,
-            items=[
-                RelayDnsItemRequest(
-                    id="0",
-                    q_b64=base64.b64encode(wire_query).decode("ascii"),
-                )
-            ],
-        )
-        body = json.dumps(payload.to_dict()).encode("utf-8")
+        if self._batch_window_s > 0:
+            return await self._enqueue(request_id, wire_query)
+
+        body = _encode_request(request_id, wire_query)
         if len(body) > limits.max_request_bytes:
-            if self.metrics:
-                self.metrics.inc("dropped_total")
-                self.metrics.inc("dropped_oversize_total")
+            self._count_oversize()
             return None
 
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "Accept-Encoding": "gzip",
-        }
-        if self.relay_cfg.auth_token:
-            headers["Authorization"] = f"Bearer {self.relay_cfg.auth_token}"
-
         if self.metrics:
             self.metrics.inc("upstream_requests_total")
             self.metrics.inc("upstream_relay_requests_total")
 
+        items = await self._post(body)
+        if items is None:
+            return None
+        item = items.get("0")
+        if item is None:
+            if self.metrics:
+                self.metrics.inc("upstream_relay_protocol_errors_total")
+            raise ValueError("relay response missing item")
+        return self._decode_item(item)
+
+    def _enqueue(self, request_id: str, wire_query: bytes) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._batch.append((request_id, wire_query, fut))
+        if len(self._batch) >= self.relay_cfg.limits.max_items:
+            self._flush_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = loop.call_later(self._batch_window_s, self._flush_batch)
+        return fut
+
+    def _flush_batch(self) -> None:
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._send_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, batch: list[tuple[str, bytes, asyncio.Future]]) -> None:
+        try:
+            results = await self._exchange_batch([wire for _id, wire, _fut in batch], batch[0][0])
+        except asyncio.CancelledError:
+            # Only close() cancels a batch; its callers get None like unsent ones.
+            for _request_id, _wire, fut in batch:
+                if not fut.done():
+                    fut.set_result(None)
+            raise
+        except Exception as exc:
+            results = [exc] * len(batch)
+        for (_request_id, _wire, fut), result in zip(batch, results, strict=True):
+            if fut.done():  # caller gave up (cancelled)
+                continue
+            if isinstance(result, Exception):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+    async def _exchange_batch(
+        self, wires: list[bytes], request_id: str
+    ) -> list[bytes | None | Exception]:
+        body = _encode_batch(request_id, wires)
+        if len(body) > self.relay_cfg.limits.max_request_bytes:
+            if len(wires) == 1:
+                self._count_oversize()
+                return [None]
+            halves = (wires[: len(wires) // 2], wires[len(wires) // 2 :])
+            # A failed half fails only its own items; the other half's answers still count.
+            parts = await asyncio.gather(
+                *(self._exchange_batch(part, request_id) for part in halves),
+                return_exceptions=True,
+            )
+            merged: list[bytes | None | Exception] = []
+            for part, part_results in zip(halves, parts, strict=True):
+                if isinstance(part_results, BaseException):
+                    if not isinstance(part_results, Exception):
+                        raise part_results
+                    part_results = [part_results] * len(part)
+                merged.extend(part_results)
+            return merged
+
+        if self.metrics:
+            self.metrics.inc("upstream_requests_total", len(wires))
+            self.metrics.inc("upstream_relay_requests_total")
+            self.metrics.inc("upstream_relay_batched_items_total", len(wires))
+
+        items = await self._post(body)
+        if items is None:
+            return [None] * len(wires)
+        results: list[bytes | None | Exception] = []
+        for index in range(len(wires)):
+            item = items.get(str(index))
+            if item is None:
+                if self.metrics:
+                    self.metrics.inc("upstream_relay_protocol_errors_total")
+                results.append(ValueError("relay response missing item"))
+                continue
+            try:
+                results.append(self._decode_item(item))
+            except ValueError as exc:
+                results.append(exc)
+        return results
+
+    async def _post(self, body: bytes) -> dict[str, RelayDnsItemResponse] | None:
+        """
+        POST one request body and return its items by id (first wins on duplicates).
+        Returns None on HTTP or client errors; raises asyncio.TimeoutError on timeout and
+        ValueError on a malformed response.
+        """
         try:
             async with self._session.post(
-                self.relay_cfg.dns_url,
+                self._dns_url,
                 data=body,
-                headers=headers,
+                headers=self._headers,
             ) as resp:
                 if resp.status != 200:
                     if self.metrics:
@@ -97,7 +283,7 @@ class RelayUpstreamForwarder:
                 self.metrics.inc("upstream_relay_client_errors_total")
             return None
 
-        if len(raw) > limits.max_response_bytes:
+        if len(raw) > self.relay_cfg.limits.max_response_bytes:
             if self.metrics:
                 self.metrics.inc("upstream_relay_client_errors_total")
             raise ValueError("relay response exceeds max_response_bytes")
@@ -109,34 +295,34 @@ class RelayUpstreamForwarder:
                 self.metrics.inc("upstream_relay_protocol_errors_total")
             raise ValueError("relay response version mismatch")
 
-        item = None
-        for candidate in response.items:
-            if candidate.id == "0":
-                item = candidate
-                break
-        if item is None:
+        items: dict[str, RelayDnsItemResponse] = {}
+        for item in response.items:
+            items.setdefault(item.id, item)
+        return items
+
+    def _decode_item(self, item: RelayDnsItemResponse) -> bytes | None:
+        if not item.ok:
+            return None
+        if item.a_b64 is None:
             if self.metrics:
                 self.metrics.inc("upstream_relay_protocol_errors_total")
-            raise ValueError("relay response missing item")
-
-        if item.ok:
-            if item.a_b64 is None:
-                if self.metrics:
-                    self.metrics.inc("upstream_relay_protocol_errors_total")
-                raise ValueError("relay response missing payload")
-            try:
-                return base64.b64decode(item.a_b64, validate=True)
-            except (ValueError, TypeError) as exc:
-                if self.metrics:
-                    self.metrics.inc("upstream_relay_protocol_errors_total")
-                raise ValueError("relay response payload invalid base64") from exc
+            raise ValueError("relay response missing payload")
+        try:
+            return _b64decode(item.a_b64)
+        except (ValueError, TypeError) as exc:
+            if self.metrics:
+                self.metrics.inc("upstream_relay_protocol_errors_total")
+            raise ValueError("relay response payload invalid base64") from exc
 
-        return None
+    def _count_oversize(self) -> None:
+        if self.metrics:
+            self.metrics.inc("dropped_total")
+            self.metrics.inc("dropped_oversize_total")
 
     def _parse_json(self, raw: bytes) -> dict[str, Any]:
         try:
-            data = json.loads(raw.decode("utf-8"))
-        except json.JSONDecodeError as exc:
+            data = _json_loads(raw)
+        except ValueError as exc:  # JSONDecodeError, or UnicodeDecodeError on bad UTF-8
             if self.metrics:
                 self.metrics.inc("upstream_relay_client_errors_total")
             raise ValueError("relay response invalid JSON") from exc
@@ -49,8 +49,8 @@ async def check_relay_startup(
         )
 
     try:
-        data = json.loads(raw.decode("utf-8"))
-    except json.JSONDecodeError as exc:
+        data = json.loads(raw)
+    except ValueError as exc:  # JSONDecodeError, or UnicodeDecodeError on bad UTF-8
         raise RelayStartupCheckError("relay /info returned invalid JSON") from exc
 
     if not isinstance(data, dict):
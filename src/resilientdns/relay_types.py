@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Any, Literal
 from urllib.parse import urlsplit
 
@@ -29,12 +30,13 @@ class RelayConfig:
     startup_check: Literal["require", "warn", "off"] = "require"
     limits: RelayLimits = field(default_factory=RelayLimits)
 
-    @property
+    # cached_property stores into the instance __dict__, which frozen dataclasses allow.
+    @cached_property
     def info_url(self) -> str:
         base = self.base_url.rstrip("/")
         return f"{base}/v{self.api_version}/info"
 
-    @property
+    @cached_property
     def dns_url(self) -> str:
         base = self.base_url.rstrip("/")
         return f"{base}/v{self.api_version}/dns"
@@ -95,39 +97,46 @@ class RelayDnsResponse:
         if not isinstance(items, list):
             raise ValueError("field 'items' must be a list")
 
+        # Happy path first: a valid item costs a few dict lookups and one constructor
+        # call. Anything else is re-checked by _item_error for the precise message.
         parsed_items: list[RelayDnsItemResponse] = []
+        append = parsed_items.append
         for item in items:
-            if not isinstance(item, dict):
-                raise ValueError("item must be an object")
-            if "id" not in item:
-                raise ValueError("item missing field: id")
-            if "ok" not in item:
-                raise ValueError("item missing field: ok")
-
-            item_id = item["id"]
-            if not isinstance(item_id, str):
-                raise ValueError("item field 'id' must be a string")
-
-            ok = item["ok"]
-            if not isinstance(ok, bool):
-                raise ValueError("item field 'ok' must be a bool")
-
-            if ok:
-                payload = item.get("a")
-                if not isinstance(payload, str):
-                    raise ValueError("ok item missing field: a")
-                parsed_items.append(
-                    RelayDnsItemResponse(id=item_id, ok=True, a_b64=payload, err=None)
-                )
-            else:
-                err = item.get("err")
-                if not isinstance(err, str):
-                    raise ValueError("error item missing field: err")
-                parsed_items.append(RelayDnsItemResponse(id=item_id, ok=False, a_b64=None, err=err))
+            if isinstance(item, dict):
+                item_id = item.get("id")
+                ok = item.get("ok")
+                if isinstance(item_id, str):
+                    if ok is True:
+                        payload = item.get("a")
+                        if isinstance(payload, str):
+                            append(RelayDnsItemResponse(item_id, True, payload))
+                            continue
+                    elif ok is False:
+                        err = item.get("err")
+                        if isinstance(err, str):
+                            append(RelayDnsItemResponse(item_id, False, None, err))
+                            continue
+            raise _item_error(item)
 
         return cls(v=v, id=request_id, items=parsed_items)
 
 
+def _item_error(item: Any) -> ValueError:
+    if not isinstance(item, dict):
+        return ValueError("item must be an object")
+    if "id" not in item:
+        return ValueError("item missing field: id")
+    if "ok" not in item:
+        return ValueError("item missing field: ok")
+    if not isinstance(item["id"], str):
+        return ValueError("item field 'id' must be a string")
+    if not isinstance(item["ok"], bool):
+        return ValueError("item field 'ok' must be a bool")
+    if item["ok"]:
+        return ValueError("ok item missing field: a")
+    return ValueError("error item missing field: err")
+
+
 def validate_limits(limits: RelayLimits) -> None:
     for name, value in limits.as_dict().items():
         if not isinstance(value, int) or value <= 0:
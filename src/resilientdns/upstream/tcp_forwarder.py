@@ -1,9 +1,13 @@
 import asyncio
+import struct
 import time
 from dataclasses import dataclass
 
 from resilientdns.metrics import Metrics
 
+# RFC 1035 TCP framing: 2-byte big-endian length before each message.
+_LEN_PREFIX = struct.Struct(">H")
+
 
 @dataclass(frozen=True)
 class UpstreamTcpConfig:
@@ -28,23 +32,16 @@ class TcpUpstreamForwarder:
     def __init__(self, config: UpstreamTcpConfig, metrics: Metrics | None = None):
         self.config = config
         self.metrics = metrics
+        # LIFO pool; pop()/append() run between awaits, so a lock would add nothing.
         self._pool: list[_PooledConnection] = []
-        self._pool_lock = asyncio.Lock()
         self._closed = False
-        if config.max_inflight > 0:
-            self._max_inflight = config.max_inflight
-            self._inflight = 0
-            self._inflight_lock = asyncio.Lock()
-        else:
-            self._max_inflight = 0
-            self._inflight = 0
-            self._inflight_lock = None
+        # Only touched on the event loop with no await in between, so no lock is needed.
+        self._max_inflight = max(config.max_inflight, 0)
+        self._inflight = 0
 
     async def close(self) -> None:
         self._closed = True
-        async with self._pool_lock:
-            conns = self._pool
-            self._pool = []
+        conns, self._pool = self._pool, []
         for conn in conns:
             await self._close_writer(conn.writer)
 
@@ -59,21 +56,20 @@ class TcpUpstreamForwarder:
         if self._closed or self.config.pool_max_conns <= 0:
             return None
         now = time.monotonic()
-        async with self._pool_lock:
-            while self._pool:
-                conn = self._pool.pop()
-                if conn.writer.is_closing() or conn.reader.at_eof():
-                    await self._close_writer(conn.writer)
-                    continue
-                if self.config.pool_idle_timeout_s <= 0:
-                    await self._close_writer(conn.writer)
-                    continue
-                if now - conn.last_used_s > self.config.pool_idle_timeout_s:
-                    await self._close_writer(conn.writer)
-                    continue
-                if self.metrics:
-                    self.metrics.inc("upstream_tcp_reuses_total")
-                return conn.reader, conn.writer
+        while self._pool:
+            conn = self._pool.pop()
+            if conn.writer.is_closing() or conn.reader.at_eof():
+                await self._close_writer(conn.writer)
+                continue
+            if self.config.pool_idle_timeout_s <= 0:
+                await self._close_writer(conn.writer)
+                continue
+            if now - conn.last_used_s > self.config.pool_idle_timeout_s:
+                await self._close_writer(conn.writer)
+                continue
+            if self.metrics:
+                self.metrics.inc("upstream_tcp_reuses_total")
+            return conn.reader, conn.writer
         return None
 
     async def _release_to_pool(
@@ -85,25 +81,22 @@ class TcpUpstreamForwarder:
         if writer.is_closing() or reader.at_eof():
             await self._close_writer(writer)
             return
-        async with self._pool_lock:
-            if len(self._pool) >= self.config.pool_max_conns:
-                await self._close_writer(writer)
-                return
-            self._pool.append(
-                _PooledConnection(reader=reader, writer=writer, last_used_s=time.monotonic())
-            )
+        if len(self._pool) >= self.config.pool_max_conns:
+            await self._close_writer(writer)
+            return
+        self._pool.append(
+            _PooledConnection(reader=reader, writer=writer, last_used_s=time.monotonic())
+        )
 
     async def query(self, wire: bytes) -> bytes | None:
         if self._closed:
             return None
-        if self._max_inflight > 0 and self._inflight_lock is not None:
-            async with self._inflight_lock:
-                if self._inflight >= self._max_inflight:
-                    if self.metrics:
-                        self.metrics.inc("dropped_total")
-                        self.metrics.inc("dropped_max_inflight_total")
-                    return None
-                self._inflight += 1
+        if self._max_inflight > 0 and self._inflight >= self._max_inflight:
+            if self.metrics:
+                self.metrics.inc("dropped_total")
+                self.metrics.inc("dropped_max_inflight_total")
+            return None
+        self._inflight += 1
         reader = None
         writer = None
         errored = True
@@ -133,7 +126,7 @@ class TcpUpstreamForwarder:
             errored = False
 
             try:
-                writer.write(len(wire).to_bytes(2, "big") + wire)
+                writer.writelines((_LEN_PREFIX.pack(len(wire)), wire))
                 await writer.drain()
 
                 try:
@@ -153,7 +146,7 @@ class TcpUpstreamForwarder:
                         self.metrics.inc("upstream_tcp_protocol_errors_total")
                     return None
 
-                msg_len = int.from_bytes(length_bytes, "big")
+                (msg_len,) = _LEN_PREFIX.unpack(length_bytes)
                 if self.config.max_message_size > 0 and msg_len > self.config.max_message_size:
                     if self.metrics:
                         self.metrics.inc("dropped_total")
@@ -205,6 +198,4 @@ class TcpUpstreamForwarder:
         finally:
             if error_for_metrics and self.metrics:
                 self.metrics.inc("upstream_tcp_errors_total")
-            if self._max_inflight > 0 and self._inflight_lock is not None:
-                async with self._inflight_lock:
-                    self._inflight -= 1
+            self._inflight -= 1
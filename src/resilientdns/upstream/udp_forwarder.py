@@ -1,6 +1,5 @@
 import asyncio
 import socket
-from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
 from resilientdns.metrics import Metrics
@@ -11,6 +10,7 @@ class UpstreamUdpConfig:
     host: str = "1.1.1.1"
     port: int = 53
     timeout_s: float = 2.0
+    # Concurrent upstream queries, each holding one UDP socket; the rest wait for a slot.
     max_workers: int = 32
     max_inflight: int = 0
 
@@ -24,46 +24,52 @@ class UdpUpstreamForwarder:
     def __init__(self, config: UpstreamUdpConfig, metrics: Metrics | None = None):
         self.config = config
         self.metrics = metrics
-        self._executor = ThreadPoolExecutor(max_workers=config.max_workers)
+        self._slots = asyncio.Semaphore(config.max_workers)
+        self._addr: tuple[int, tuple] | None = None
         self._closed = False
-        if config.max_inflight > 0:
-            self._max_inflight = config.max_inflight
-            self._inflight = 0
-            self._inflight_lock = asyncio.Lock()
-        else:
-            self._max_inflight = 0
-            self._inflight = 0
-            self._inflight_lock = None
+        # Only touched on the event loop with no await in between, so no lock is needed.
+        self._max_inflight = max(config.max_inflight, 0)
+        self._inflight = 0
 
     async def query(self, wire: bytes) -> bytes | None:
         if self._closed:
             return None
-        if self._max_inflight > 0 and self._inflight_lock is not None:
-            async with self._inflight_lock:
-                if self._inflight >= self._max_inflight:
-                    if self.metrics:
-                        self.metrics.inc("dropped_total")
-                        self.metrics.inc("dropped_max_inflight_total")
-                    return None
-                self._inflight += 1
+        if self._max_inflight > 0 and self._inflight >= self._max_inflight:
+            if self.metrics:
+                self.metrics.inc("dropped_total")
+                self.metrics.inc("dropped_max_inflight_total")
+            return None
+        self._inflight += 1
         try:
-            loop = asyncio.get_running_loop()
-            return await loop.run_in_executor(self._executor, self._query_blocking, wire)
+            async with self._slots:
+                return await self._query_once(wire)
         finally:
-            if self._max_inflight > 0 and self._inflight_lock is not None:
-                async with self._inflight_lock:
-                    self._inflight -= 1
+            self._inflight -= 1
 
-    def _query_blocking(self, wire: bytes) -> bytes | None:
+    async def _resolve(self) -> tuple[int, tuple]:
+        if self._addr is None:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                self.config.host, self.config.port, type=socket.SOCK_DGRAM
+            )
+            family, _type, _proto, _name, sockaddr = infos[0]
+            self._addr = (family, sockaddr)
+        return self._addr
+
+    async def _query_once(self, wire: bytes) -> bytes | None:
         if self.metrics:
             self.metrics.inc("upstream_requests_total")
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.settimeout(self.config.timeout_s)
+        s = None
         try:
-            s.sendto(wire, (self.config.host, self.config.port))
-            data, _ = s.recvfrom(65535)
-            return data
-        except TimeoutError:
+            family, sockaddr = await self._resolve()
+            # A fresh connected socket per query keeps a random source port per query, and
+            # the kernel drops replies from anywhere but the upstream.
+            s = socket.socket(family, socket.SOCK_DGRAM)
+            s.setblocking(False)
+            s.connect(sockaddr)
+            s.send(wire)
+            loop = asyncio.get_running_loop()
+            return await asyncio.wait_for(loop.sock_recv(s, 65535), self.config.timeout_s)
+        except asyncio.TimeoutError:
             if self.metrics:
                 self.metrics.inc("upstream_udp_errors_total")
                 self.metrics.inc("upstream_udp_timeouts_total")
@@ -73,13 +79,10 @@ class UdpUpstreamForwarder:
                 self.metrics.inc("upstream_udp_errors_total")
             return None
         finally:
-            s.close()
+            if s is not None:
+                s.close()
 
     def close(self) -> None:
         if self._closed:
             return
         self._closed = True
-        try:
-            self._executor.shutdown(wait=False, cancel_futures=True)
-        except TypeError:
-            self._executor.shutdown(wait=False)
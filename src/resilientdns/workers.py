@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import logging
+import os
+import signal
+from collections.abc import Callable
+
+logger = logging.getLogger("resilientdns")
+
+_FORWARDED_SIGNALS = tuple(
+    getattr(signal, name) for name in ("SIGINT", "SIGTERM", "SIGHUP") if hasattr(signal, name)
+)
+
+
+def pin_cpu(index: int) -> int | None:
+    """
+    Pin the calling process to one CPU from its allowed set, chosen round-robin by
+    index. Returns the CPU, or None where affinity is unsupported or refused.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    cpu = cpus[index % len(cpus)]
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError as exc:
+        logger.warning("Could not pin worker %d to CPU %d: %s", index, cpu, exc)
+        return None
+    return cpu
+
+
+def run_workers(n: int, target: Callable[[int], None]) -> int:
+    """
+    Fork n worker processes that each call target(index), then wait for all of them.
+
+    Workers are expected to bind their listeners with SO_REUSEPORT so the kernel
+    spreads client flows across them. SIGINT/SIGTERM/SIGHUP received by the parent
+    are forwarded to every live worker. Returns 0 if all workers exited cleanly,
+    else 1. POSIX only.
+    """
+    if n < 1:
+        raise ValueError("n must be >= 1")
+
+    children: dict[int, int] = {}
+    previous = {sig: signal.getsignal(sig) for sig in _FORWARDED_SIGNALS}
+
+    def forward(signum, _frame) -> None:
+        for pid in children:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    for sig in _FORWARDED_SIGNALS:
+        signal.signal(sig, forward)
+
+    try:
+        for index in range(n):
+            pid = os.fork()
+            if pid == 0:
+                for sig, handler in previous.items():
+                    signal.signal(sig, handler)
+                code = 0
+                try:
+                    target(index)
+                except KeyboardInterrupt:
+                    pass
+                except SystemExit as exc:
+                    code = exc.code if isinstance(exc.code, int) else 1
+                except BaseException:
+                    logger.exception("Worker %d failed", index)
+                    code = 1
+                finally:
+                    logging.shutdown()
+                os._exit(code)
+            children[pid] = index
+            logger.info("Started worker %d (pid %d)", index, pid)
+
+        failed = False
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = children.pop(pid, None)
+            if index is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0:
+                failed = True
+                logger.warning("Worker %d (pid %d) exited with %d", index, pid, code)
+        return 1 if failed else 0
+    finally:
+        forward(signal.SIGTERM, None)
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+import pytest
+
+from resilientdns.cache import memory
+
+
+def test_now_falls_back_to_monotonic_without_ticker():
+    assert memory._cached_now is None
+    before = time.monotonic()
+    assert before <= memory._now() <= time.monotonic()
+
+
+def test_clock_ticker_updates_and_resets_cached_now():
+    async def run():
+        task = asyncio.create_task(memory.run_clock_ticker(tick_ms=1))
+        await asyncio.sleep(0.01)
+        assert memory._cached_now is not None
+        first = memory._now()
+        await asyncio.sleep(0.01)
+        assert memory._now() >= first
+
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert memory._cached_now is None
+
+    asyncio.run(run())
+
+
+def test_clock_ticker_rejects_sub_millisecond_tick():
+    with pytest.raises(ValueError, match="tick_ms"):
+        asyncio.run(memory.run_clock_ticker(tick_ms=0))
+
+
+def test_put_wire_uses_the_cached_clock(monkeypatch):
+    monkeypatch.setattr(memory, "_cached_now", 1000.0)
+    cache = memory.MemoryDnsCache(memory.CacheConfig())
+    key = ("example.com", 1, 1)
+    cache.put_wire(key, b"\x00" * 12, 0, 30)
+    assert cache.peek(key).expires_at == 1030.0
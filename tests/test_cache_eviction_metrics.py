@@ -32,3 +32,6 @@ def test_evictions_and_cache_entries_metrics():
     snap = metrics.snapshot()
     assert snap.get("evictions_total", 0) == 1
     assert snap.get("cache_entries", 0) == 1
+    assert metrics.get("evictions_total") == 1
+    assert metrics.get("missing_total") == 0
+    assert cache.stats_snapshot()["evictions_total"] == 1
@@ -48,6 +48,26 @@ def test_lru_touch_on_get():
     assert cache.get_fresh(_key("c.example")) is not None
 
 
+def test_clock_second_chance_is_spent_once():
+    cache = MemoryDnsCache(CacheConfig(max_entries=2))
+    cache.put(_key("a.example"), _make_response("a.example", "1.1.1.1"))
+    cache.put(_key("b.example"), _make_response("b.example", "2.2.2.2"))
+
+    assert cache.get_fresh(_key("a.example")) is not None
+    cache.put(_key("c.example"), _make_response("c.example", "3.3.3.3"))
+    assert cache.peek(_key("b.example")) is None
+
+    # "a" was re-queued behind "c" with its bit cleared.
+    cache.put(_key("d.example"), _make_response("d.example", "4.4.4.4"))
+    assert cache.peek(_key("c.example")) is None
+    assert cache.peek(_key("a.example")) is not None
+
+    cache.put(_key("e.example"), _make_response("e.example", "5.5.5.5"))
+    assert cache.peek(_key("a.example")) is None
+    assert cache.peek(_key("d.example")) is not None
+    assert cache.peek(_key("e.example")) is not None
+
+
 def test_no_eviction_when_unlimited():
     cache = MemoryDnsCache(CacheConfig(max_entries=0))
     cache.put(_key("a.example"), _make_response("a.example", "1.1.1.1"))
@@ -85,3 +105,40 @@ def test_expired_entries_evicted_first():
     assert _key("expired.example") not in cache._store
     assert _key("valid.example") in cache._store
     assert _key("new.example") in cache._store
+
+
+def test_replaced_entry_ignores_outdated_expiry_record():
+    cache = MemoryDnsCache(CacheConfig(max_entries=2))
+    now = time.monotonic()
+    cache._put_entry_for_test(
+        _key("x.example"),
+        CacheEntry(response_wire=b"old", expires_at=now - 20, stale_until=now - 10, rcode=0),
+    )
+    cache._put_entry_for_test(
+        _key("x.example"),
+        CacheEntry(response_wire=b"new", expires_at=now + 20, stale_until=now + 40, rcode=0),
+    )
+    assert cache.get_fresh(_key("x.example")) == b"new"
+
+    cache.put(_key("a.example"), _make_response("a.example", "1.1.1.1"))
+    cache.put(_key("b.example"), _make_response("b.example", "2.2.2.2"))
+
+    assert cache.get_fresh(_key("x.example")) == b"new"
+    assert cache.peek(_key("a.example")) is None
+    assert cache.peek(_key("b.example")) is not None
+
+
+def test_stale_hit_does_not_protect_from_eviction():
+    cache = MemoryDnsCache(CacheConfig(max_entries=2, serve_stale_max_s=300))
+    now = time.monotonic()
+    cache._put_entry_for_test(
+        _key("stale.example"),
+        CacheEntry(response_wire=b"stale", expires_at=now - 5, stale_until=now + 60, rcode=0),
+    )
+    cache.put(_key("a.example"), _make_response("a.example", "1.1.1.1"))
+
+    assert cache.get_stale(_key("stale.example")) == b"stale"
+    cache.put(_key("b.example"), _make_response("b.example", "2.2.2.2"))
+
+    assert cache.peek(_key("stale.example")) is None
+    assert cache.peek(_key("a.example")) is not None
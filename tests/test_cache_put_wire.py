@@ -0,0 +1,50 @@
+import time
+
+from dnslib import QTYPE, RR, A, DNSRecord
+
+from resilientdns.cache.memory import CacheConfig, MemoryDnsCache
+from resilientdns.metrics import Metrics
+
+
+def test_put_stores_given_wire_verbatim():
+    cache = MemoryDnsCache(CacheConfig())
+    req = DNSRecord.question("example.com", qtype="A")
+    reply = req.reply()
+    reply.add_answer(RR(rname=req.q.qname, rtype=QTYPE.A, rclass=1, ttl=60, rdata=A("1.2.3.4")))
+    wire = reply.pack()
+    key = ("example.com", int(QTYPE.A), 1)
+
+    cache.put(key, reply, wire=wire)
+
+    assert cache.get_fresh(key) is wire
+
+
+def test_put_wire_uses_caller_ttl():
+    cache = MemoryDnsCache(CacheConfig(serve_stale_max_s=10))
+    key = ("example.com", int(QTYPE.A), 1)
+    now = time.monotonic()
+
+    cache.put_wire(key, b"wire", 3, 42)
+
+    entry = cache.peek(key)
+    assert entry is not None
+    assert entry.is_negative
+    assert abs(entry.expires_at - now - 42) <= 1.0
+    assert abs(entry.stale_until - entry.expires_at - 10) <= 1e-6
+
+
+def test_negative_fresh_hits_are_counted_only_with_metrics():
+    key = ("example.com", int(QTYPE.A), 1)
+    metrics = Metrics()
+    counted = MemoryDnsCache(CacheConfig(), metrics=metrics)
+    counted.put_wire(key, b"nx", 3, 60)
+    counted.put_wire(("ok.example", 1, 1), b"ok", 0, 60)
+
+    assert counted.get_fresh(key) == b"nx"
+    assert counted.get_fresh(("ok.example", 1, 1)) == b"ok"
+    assert metrics.get("negative_cache_hit_total") == 1
+
+    plain = MemoryDnsCache(CacheConfig())
+    plain.put_wire(key, b"nx", 3, 60)
+    assert plain.get_fresh(key) == b"nx"
+    assert plain.peek(key).hits == 1
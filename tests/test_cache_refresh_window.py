@@ -0,0 +1,38 @@
+import time
+
+from resilientdns.cache.memory import CacheConfig, CacheEntry, MemoryDnsCache
+
+
+def _entry(expires_at: float) -> CacheEntry:
+    return CacheEntry(
+        response_wire=b"x", expires_at=expires_at, stale_until=expires_at + 60, rcode=0
+    )
+
+
+def test_refresh_window_returns_live_entries_in_expiry_order():
+    cache = MemoryDnsCache(CacheConfig())
+    now = time.monotonic()
+    cache._put_entry_for_test(("late.example", 1, 1), _entry(now + 20))
+    cache._put_entry_for_test(("soon.example", 1, 1), _entry(now + 5))
+    cache._put_entry_for_test(("far.example", 1, 1), _entry(now + 300))
+    cache._put_entry_for_test(("expired.example", 1, 1), _entry(now - 1))
+
+    due = cache.refresh_window(now, now + 30)
+    assert [k[0] for k, _ in due] == ["soon.example", "late.example"]
+
+    # Still indexed on the next scan; entries inserted later are picked up too.
+    cache._put_entry_for_test(("new.example", 1, 1), _entry(now + 10))
+    due = cache.refresh_window(now, now + 30)
+    assert [k[0] for k, _ in due] == ["soon.example", "new.example", "late.example"]
+
+
+def test_refresh_window_follows_replaced_entries():
+    cache = MemoryDnsCache(CacheConfig())
+    now = time.monotonic()
+    key = ("example.com", 1, 1)
+    cache._put_entry_for_test(key, _entry(now + 5))
+    assert len(cache.refresh_window(now, now + 30)) == 1
+
+    cache._put_entry_for_test(key, _entry(now + 120))
+    assert cache.refresh_window(now, now + 30) == []
+    assert [k for k, _ in cache.refresh_window(now, now + 150)] == [key]
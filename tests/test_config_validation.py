@@ -12,12 +12,17 @@ def _args() -> argparse.Namespace:
         max_inflight=256,
         metrics_host="127.0.0.1",
         metrics_port=0,
+        listen_rcvbuf=0,
+        listen_sndbuf=0,
+        udp_busy_poll_us=0,
+        workers=1,
         upstream_transport="udp",
         upstream_host="1.1.1.1",
         upstream_port=53,
         upstream_timeout=2.0,
         serve_stale_max=300,
         negative_ttl=60,
+        parse_offload_min_bytes=0,
         verbose=False,
         relay_base_url=None,
         relay_api_version=1,
@@ -27,6 +32,7 @@ def _args() -> argparse.Namespace:
         relay_max_request_bytes=65536,
         relay_per_item_max_wire_bytes=4096,
         relay_max_response_bytes=262144,
+        relay_batch_window_ms=0.0,
         refresh_enabled=False,
         refresh_ahead_seconds=30,
         refresh_popularity_threshold=5,
@@ -46,6 +52,13 @@ def test_config_valid():
     validate_config(cfg)
 
 
+def test_build_config_rejects_invalid_args():
+    args = _args()
+    args.listen_port = 0
+    with pytest.raises(ValueError, match="listen_port"):
+        build_config(args)
+
+
 def test_config_invalid_listen_port():
     args = _args()
     args.listen_port = 0
@@ -98,3 +111,28 @@ def test_refresh_requires_positive_concurrency():
     args.refresh_concurrency = 0
     with pytest.raises(ValueError, match="refresh_concurrency must be >= 1"):
         validate_config(build_config(args))
+
+
+def test_config_invalid_listen_rcvbuf():
+    args = _args()
+    args.listen_rcvbuf = -1
+    with pytest.raises(ValueError, match="listen_rcvbuf_bytes"):
+        validate_config(build_config(args))
+
+
+def test_config_maps_udp_busy_poll():
+    args = _args()
+    args.udp_busy_poll_us = 50
+    assert build_config(args).udp_busy_poll_us == 50
+    args.udp_busy_poll_us = -1
+    with pytest.raises(ValueError, match="udp_busy_poll_us"):
+        validate_config(build_config(args))
+
+
+def test_config_maps_parse_offload_min_bytes():
+    args = _args()
+    args.parse_offload_min_bytes = 4096
+    assert build_config(args).parse_offload_min_bytes == 4096
+    args.parse_offload_min_bytes = -1
+    with pytest.raises(ValueError, match="parse_offload_min_bytes"):
+        validate_config(build_config(args))
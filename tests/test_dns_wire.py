@@ -0,0 +1,72 @@
+import pytest
+from dnslib import QTYPE, RR, A, DNSLabel, DNSRecord
+
+from resilientdns.dns.wire import min_answer_ttl, read_question, truncate
+
+
+def _reply(*ttls: int) -> DNSRecord:
+    req = DNSRecord.question("www.example.com", qtype="A")
+    reply = req.reply()
+    for i, ttl in enumerate(ttls):
+        reply.add_answer(
+            RR(rname=req.q.qname, rtype=QTYPE.A, rclass=1, ttl=ttl, rdata=A(f"10.0.0.{i}"))
+        )
+    return reply
+
+
+def test_min_answer_ttl_matches_dnslib():
+    # Repeated owner names are emitted as compression pointers.
+    wire = _reply(300, 42, 120).pack()
+    assert min_answer_ttl(wire) == 42
+    assert min_answer_ttl(wire) == min(r.ttl for r in DNSRecord.parse(wire).rr)
+
+
+def test_min_answer_ttl_without_answers():
+    assert min_answer_ttl(_reply().pack()) is None
+
+
+def test_min_answer_ttl_rejects_truncated():
+    wire = _reply(60).pack()
+    with pytest.raises(ValueError):
+        min_answer_ttl(wire[:-2])
+    with pytest.raises(ValueError):
+        min_answer_ttl(wire[:8])
+
+
+def test_truncate_matches_dnslib_clear_and_repack():
+    reply = _reply(60, 60)
+    reply.header.id = 0xABCD
+    wire = reply.pack()
+
+    expected = DNSRecord.parse(wire)
+    expected.header.tc = 1
+    expected.rr = []
+    expected.auth = []
+    expected.ar = []
+    assert truncate(wire) == expected.pack()
+    with pytest.raises(ValueError):
+        truncate(wire[:14])
+
+
+def _handler_style_key(wire: bytes) -> tuple[str, int, int]:
+    q = DNSRecord.parse(wire).q
+    return (str(q.qname).rstrip(".").lower(), int(q.qtype), int(q.qclass))
+
+
+def test_read_question_matches_dnslib_normalization():
+    for qname, qtype in (("WWW.Example.COM", "A"), ("x_y-z.example", "AAAA"), (".", "NS")):
+        wire = DNSRecord.question(qname, qtype).pack()
+        assert read_question(wire) == _handler_style_key(wire)
+
+    odd = DNSRecord.question("example.com", "TXT")
+    odd.q.qname = DNSLabel((b"A b\x01", b"example"))
+    wire = odd.pack()
+    assert read_question(wire) == _handler_style_key(wire)
+
+
+def test_read_question_rejects_missing_or_truncated_question():
+    wire = DNSRecord.question("example.com", "A").pack()
+    assert read_question(wire[:12]) is None
+    assert read_question(wire[:-1]) is None
+    no_question = DNSRecord()
+    assert read_question(no_question.pack()) is None
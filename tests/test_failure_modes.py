@@ -147,3 +147,26 @@ def test_stale_error_serves_stale_immediately():
         assert snap.get("queries_total", 0) == 1
 
     asyncio.run(run())
+
+
+def test_upstream_type_error_is_not_retried_and_request_id_is_passed():
+    class TypeErrorUpstream:
+        def __init__(self):
+            self.request_ids = []
+
+        async def query(self, wire: bytes, *, request_id: str):
+            self.request_ids.append(request_id)
+            raise TypeError("bug inside upstream")
+
+    async def run():
+        upstream = TypeErrorUpstream()
+        handler = DnsHandler(upstream=upstream, cache=MemoryDnsCache(CacheConfig()))
+        request = DNSRecord.question("example.com", qtype="A")
+        request.header.id = 4242
+
+        resp = await handler.handle(request, ("127.0.0.1", 5353))
+
+        assert resp.header.rcode == RCODE.SERVFAIL
+        assert upstream.request_ids == ["4242"]
+
+    asyncio.run(run())
@@ -107,8 +107,8 @@ def test_invariant_saturation_is_drop_not_upstream_error():
         server.datagram_received(payload, ("127.0.0.1", 5353))
 
         gate.set()
-        if server._inflight:
-            await asyncio.gather(*list(server._inflight), return_exceptions=True)
+        # Without run() there are no workers: the first datagram stays queued.
+        assert server._pending == 1
 
         snap = metrics.snapshot()
         assert snap.get("dropped_total", 0) >= 1
@@ -177,18 +177,18 @@ def test_no_upstream_attempt_after_max_inflight_drop():
         cache = MemoryDnsCache(CacheConfig(), metrics=metrics)
         handler = DnsHandler(upstream=upstream, cache=cache, metrics=metrics)
 
-        original_handle = handler.handle
+        original_handle = handler.handle_wire
 
         async def blocked_handle(request, client_addr):
             started.set()
             await gate.wait()
             return await original_handle(request, client_addr)
 
-        handler.handle = blocked_handle  # type: ignore[assignment]
+        handler.handle_wire = blocked_handle  # type: ignore[assignment]
 
         class TestUdpServer(UdpDnsServer):
             def datagram_received(self, data: bytes, addr):
-                if self.config.max_inflight > 0 and len(self._inflight) >= self.config.max_inflight:
+                if self.config.max_inflight > 0 and self._pending >= self.config.max_inflight:
                     if self.metrics:
                         self.metrics.inc("dropped_total")
                         self.metrics.inc("dropped_max_inflight_total")
@@ -218,8 +218,7 @@ def test_no_upstream_attempt_after_max_inflight_drop():
             after = metrics.snapshot().get("upstream_requests_total", 0)
         finally:
             gate.set()
-            if server._inflight:
-                await asyncio.gather(*list(server._inflight), return_exceptions=True)
+            await asyncio.wait_for(server._queue.join(), timeout=1.0)
             server.stop()
             await server_task
             sock.close()
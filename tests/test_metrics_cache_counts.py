@@ -1,11 +1,12 @@
 import asyncio
+import threading
 import time
 
 from dnslib import QTYPE, RR, A, DNSRecord
 
 from resilientdns.cache.memory import CacheConfig, CacheEntry, MemoryDnsCache
 from resilientdns.dns.handler import DnsHandler
-from resilientdns.metrics import Metrics
+from resilientdns.metrics import Metrics, format_stats, start_stats_reporter
 
 
 class FakeUpstream:
@@ -85,3 +86,56 @@ def test_metrics_cache_counts():
         assert snap.get("queries_total", 0) == 3
 
     asyncio.run(run())
+
+
+def test_bound_counter_shares_storage_with_inc():
+    metrics = Metrics()
+    ctr = metrics.counter("queries_total")
+    ctr()
+    metrics.inc("queries_total")
+    ctr()
+    assert metrics.get("queries_total") == 3
+
+
+def test_increments_from_other_threads_are_folded_in():
+    metrics = Metrics()
+    metrics.inc("upstream_requests_total")
+
+    def worker():
+        for _ in range(1000):
+            metrics.inc("upstream_requests_total")
+        metrics.set("cache_entries", 7)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    snap = metrics.snapshot()
+    assert snap["upstream_requests_total"] == 4001
+    assert snap["cache_entries"] == 7
+
+
+def test_stats_reporter_thread_logs_and_stops(caplog):
+    metrics = Metrics()
+    metrics.inc("queries_total", 3)
+
+    with caplog.at_level("INFO", logger="resilientdns"):
+        stop = start_stats_reporter(metrics, interval_s=0.01)
+        try:
+            deadline = time.monotonic() + 2.0
+            while "STATS" not in caplog.text and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            stop()
+
+    assert "queries=3" in caplog.text
+    assert not any(t.name == "resilientdns-stats" for t in threading.enumerate())
+
+
+def test_format_stats_fills_missing_fields_with_zero():
+    line = format_stats({"queries_total": 7, "cache_entries": 2, "unrelated_total": 9})
+    assert line.startswith("STATS queries=7 hit_fresh=0 ")
+    assert line.endswith(" cache_entries=2 evictions=0")
+    assert "unrelated" not in line
@@ -80,3 +80,41 @@ def test_swr_refresh_builds_query_with_qtype_name():
         assert int(upstream.last_request.q.qtype) == int(QTYPE.A)
 
     asyncio.run(run())
+
+
+def test_concurrent_stale_hits_trigger_single_refresh():
+    async def run():
+        cache = MemoryDnsCache(CacheConfig(serve_stale_max_s=60))
+        gate = asyncio.Event()
+
+        class GatedUpstream(FakeUpstream):
+            async def query(self, wire: bytes):
+                self.calls += 1
+                self.called.set()
+                await gate.wait()
+                return _make_response(wire, "5.6.7.8")
+
+        upstream = GatedUpstream([])
+        handler = DnsHandler(upstream=upstream, cache=cache)
+        request = DNSRecord.question("example.com", qtype="A")
+        key = ("example.com", int(QTYPE.A), 1)
+        now = time.monotonic()
+        cache._store[key] = CacheEntry(
+            response_wire=_make_response(request.pack(), "1.2.3.4"),
+            expires_at=now - 10,
+            stale_until=now + 60,
+            rcode=0,
+        )
+
+        for _ in range(3):
+            await handler.handle(request, ("127.0.0.1", 5353))
+        await asyncio.wait_for(upstream.called.wait(), timeout=0.2)
+        assert upstream.calls == 1
+        assert key in handler.inflight_keys
+
+        gate.set()
+        await asyncio.sleep(0.01)
+        assert key not in handler.inflight_keys
+        assert cache.get_fresh(key) is not None
+
+    asyncio.run(run())
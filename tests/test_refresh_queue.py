@@ -1,5 +1,7 @@
 import asyncio
 
+import pytest
+
 from resilientdns.cache.memory import CacheConfig, MemoryDnsCache
 from resilientdns.dns.handler import DnsHandler, HandlerConfig
 from resilientdns.metrics import Metrics
@@ -28,6 +30,10 @@ def test_refresh_enqueue_dedup():
         assert snapshot.get("cache_refresh_enqueued_total") == 1
         assert snapshot.get("cache_refresh_dropped_total{reason=duplicate}") == 1
         assert handler.refresh_queue.qsize() == 1
+        assert handler.queued_keys == {key}
+        assert not handler.inflight_keys
+        with pytest.raises(AttributeError):
+            handler.queued_keys.discard(key)  # snapshot, not the live dedup state
 
     asyncio.run(run())
 
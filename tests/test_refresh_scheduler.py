@@ -402,3 +402,101 @@ def test_refresh_fail_counts_fail_only_when_attempted():
         await handler.stop_refresh_tasks()
 
     asyncio.run(run())
+
+
+def test_refresh_query_wire_is_cached_and_gets_fresh_txid():
+    handler = DnsHandler(
+        upstream=GateUpstream(asyncio.Event(), asyncio.Event()),
+        cache=MemoryDnsCache(CacheConfig()),
+    )
+    key = ("example.com", int(QTYPE.A), 3)
+
+    wire1 = handler._refresh_query_wire(key, "A", 0x1111)
+    wire2 = handler._refresh_query_wire(key, "A", 0x2222)
+
+    assert len(handler._refresh_wire_cache) == 1
+    assert wire1[:2] == b"\x11\x11"
+    assert wire2[:2] == b"\x22\x22"
+    assert wire1[2:] == wire2[2:]
+    q = DNSRecord.parse(wire2).q
+    assert (str(q.qname), q.qtype, q.qclass) == ("example.com.", QTYPE.A, 3)
+
+
+class PerNameGateUpstream:
+    def __init__(self):
+        self.gates: dict[str, asyncio.Event] = {}
+        self.calls: dict[str, int] = {}
+
+    def gate(self, qname: str) -> asyncio.Event:
+        return self.gates.setdefault(qname, asyncio.Event())
+
+    async def query(self, wire: bytes):
+        qname = str(DNSRecord.parse(wire).q.qname).rstrip(".")
+        self.calls[qname] = self.calls.get(qname, 0) + 1
+        await self.gate(qname).wait()
+        return _make_response(wire, "9.9.9.9")
+
+
+def test_worker_does_not_clear_swr_refresh_mark():
+    async def run():
+        cache = MemoryDnsCache(CacheConfig())
+        upstream = PerNameGateUpstream()
+        handler = DnsHandler(
+            upstream=upstream,
+            cache=cache,
+            config=HandlerConfig(
+                refresh_enabled=True,
+                refresh_concurrency=1,
+                refresh_queue_max=4,
+            ),
+        )
+
+        now = time.monotonic()
+        busy_key = ("busy.com", int(QTYPE.A), 1)
+        stale_key = ("stale.com", int(QTYPE.A), 1)
+        busy_req = DNSRecord.question("busy.com", qtype="A")
+        stale_req = DNSRecord.question("stale.com", qtype="A")
+        cache._put_entry_for_test(
+            busy_key,
+            CacheEntry(
+                response_wire=_make_response(busy_req.pack(), "1.2.3.4"),
+                expires_at=now + 10,
+                stale_until=now + 120,
+                rcode=0,
+                hits=10,
+            ),
+        )
+        cache._put_entry_for_test(
+            stale_key,
+            CacheEntry(
+                response_wire=_make_response(stale_req.pack(), "1.2.3.4"),
+                expires_at=now - 1,
+                stale_until=now + 120,
+                rcode=0,
+                hits=10,
+            ),
+        )
+
+        # Keep the only worker busy so the stale hit's queue item waits behind it.
+        handler.enqueue_refresh(busy_key, reason="tick")
+        handler.start_refresh_tasks()
+        while upstream.calls.get("busy.com") != 1:
+            await asyncio.sleep(0)
+
+        await handler.handle(stale_req, ("127.0.0.1", 5353))
+        while upstream.calls.get("stale.com") != 1:
+            await asyncio.sleep(0)
+
+        # Free the worker; it picks up the queued stale key while SWR is still running.
+        upstream.gate("busy.com").set()
+        await asyncio.wait_for(handler.refresh_queue.join(), timeout=0.5)
+
+        await handler.handle(stale_req, ("127.0.0.1", 5353))
+        await asyncio.sleep(0)
+        assert upstream.calls["stale.com"] == 1
+
+        upstream.gate("stale.com").set()
+        await handler.stop_refresh_tasks()
+        await asyncio.gather(*handler._swr_tasks)
+
+    asyncio.run(run())
@@ -41,3 +41,14 @@ def test_qclass_defaults_to_in():
     items, invalid = parse_warmup_source(text)
     assert invalid == 0
     assert items[0][2] == CLASS.IN
+
+
+def test_qtype_spellings_and_commented_pairs():
+    text = "a.com aaaa\r\nb.com Mx\nc.com 0028\n# d.com A\n#e.com\n. A\nf.com 70000\n"
+    items, invalid = parse_warmup_source(text)
+    assert items == [
+        ("a.com", 28, CLASS.IN),
+        ("b.com", 15, CLASS.IN),
+        ("c.com", 28, CLASS.IN),
+    ]
+    assert invalid == 2
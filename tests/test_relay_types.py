@@ -2,6 +2,7 @@ import pytest
 
 from resilientdns.relay_types import (
     RelayConfig,
+    RelayDnsItemResponse,
     RelayDnsResponse,
     RelayLimits,
     validate_base_url,
@@ -51,3 +52,32 @@ def test_relay_response_err_requires_error():
     data = {"v": 1, "id": "req", "items": [{"id": "a", "ok": False}]}
     with pytest.raises(ValueError, match="error item"):
         RelayDnsResponse.from_dict(data)
+
+
+def test_relay_response_parses_items():
+    data = {
+        "v": 1,
+        "id": "req",
+        "items": [{"id": "0", "ok": True, "a": "AAE="}, {"id": "1", "ok": False, "err": "x"}],
+    }
+    resp = RelayDnsResponse.from_dict(data)
+    assert resp.items == [
+        RelayDnsItemResponse(id="0", ok=True, a_b64="AAE="),
+        RelayDnsItemResponse(id="1", ok=False, err="x"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "item, message",
+    [
+        ("x", "item must be an object"),
+        ({"ok": True}, "item missing field: id"),
+        ({"id": 1}, "item missing field: ok"),
+        ({"id": 1, "ok": True, "a": "AAE="}, "item field 'id' must be a string"),
+        ({"id": "a", "ok": 1, "a": "AAE="}, "item field 'ok' must be a bool"),
+        ({"id": "a", "ok": True, "a": None}, "ok item missing field: a"),
+    ],
+)
+def test_relay_response_item_errors(item, message):
+    with pytest.raises(ValueError, match=message):
+        RelayDnsResponse.from_dict({"v": 1, "id": "req", "items": [item]})
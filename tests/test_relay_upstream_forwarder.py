@@ -1,11 +1,25 @@
 import asyncio
+import base64
+import json
 
 import pytest
 from fake_relay.types import DnsHandlerMode, DnsItemResult
 
 from resilientdns.metrics import Metrics
-from resilientdns.relay_forwarder import RelayUpstreamForwarder
-from resilientdns.relay_types import RelayConfig, RelayLimits
+from resilientdns.relay_forwarder import (
+    RelayUpstreamForwarder,
+    _b64decode,
+    _b64encode,
+    _encode_batch,
+    _encode_request,
+    _json_dumps,
+)
+from resilientdns.relay_types import (
+    RelayConfig,
+    RelayDnsItemRequest,
+    RelayDnsRequest,
+    RelayLimits,
+)
 
 
 @pytest.mark.asyncio
@@ -133,3 +147,235 @@ async def test_relay_forwarder_client_error_metrics():
     assert resp is None
     snap = metrics.snapshot()
     assert snap.get("upstream_relay_client_errors_total", 0) == 1
+
+
+def test_relay_b64_helpers_match_stdlib():
+    wire = bytes(range(256))
+    assert _b64encode(wire) == base64.b64encode(wire)
+    assert _b64decode(_b64encode(wire)) == wire
+    assert _b64decode(_b64encode(wire).decode("ascii")) == wire
+    for bad in ("not base64!", "AAE=A", "AA\nE="):
+        with pytest.raises(ValueError):
+            _b64decode(bad)
+
+
+def test_relay_request_body_is_compact_json():
+    payload = {"v": 1, "id": "req", "items": [{"id": "0", "q": "AAE="}]}
+    body = _json_dumps(payload)
+    assert isinstance(body, bytes)
+    assert b" " not in body
+    assert json.loads(body) == payload
+
+
+@pytest.mark.asyncio
+async def test_relay_forwarder_parses_json_bytes():
+    metrics = Metrics()
+    forwarder = RelayUpstreamForwarder(
+        relay_cfg=RelayConfig(base_url="http://127.0.0.1:1"),
+        metrics=metrics,
+        timeout_s=0.5,
+    )
+    try:
+        assert forwarder._parse_json(b'{"v": 1, "items": []}') == {"v": 1, "items": []}
+        for raw in (b"{not json", b"\xff\xfe"):
+            with pytest.raises(ValueError, match="invalid JSON"):
+                forwarder._parse_json(raw)
+    finally:
+        await forwarder.close()
+
+    assert metrics.snapshot().get("upstream_relay_client_errors_total", 0) == 2
+
+
+@pytest.mark.parametrize("request_id", ["12345", "req-1", 'needs "escaping"\n', "ü"])
+def test_relay_request_envelope_matches_json(request_id):
+    wire = bytes(range(40))
+    body = _encode_request(request_id, wire)
+    q_b64 = base64.b64encode(wire).decode("ascii")
+    expected = RelayDnsRequest(
+        v=1, id=request_id, items=[RelayDnsItemRequest(id="0", q_b64=q_b64)]
+    ).to_dict()
+    assert json.loads(body) == expected
+    assert body == _json_dumps(expected)
+
+
+@pytest.mark.asyncio
+async def test_relay_forwarder_connector_limits():
+    forwarder = RelayUpstreamForwarder(
+        relay_cfg=RelayConfig(base_url="http://127.0.0.1:1"),
+        metrics=None,
+        timeout_s=0.5,
+        max_conns=8,
+    )
+    try:
+        connector = forwarder._session.connector
+        assert connector.limit == 8
+        assert connector.limit_per_host == 8
+    finally:
+        await forwarder.close()
+
+
+def _echo_items(data):
+    return [
+        DnsItemResult.ok_result(item["id"], b"re:" + base64.b64decode(item["q"]))
+        for item in data["items"]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_relay_forwarder_batches_concurrent_queries(fake_relay_server):
+    base_url, controller = fake_relay_server
+    controller.script.next_dns_results = _echo_items
+
+    metrics = Metrics()
+    forwarder = RelayUpstreamForwarder(
+        relay_cfg=RelayConfig(base_url=base_url),
+        metrics=metrics,
+        timeout_s=0.5,
+        batch_window_s=0.01,
+    )
+    try:
+        wires = [b"query-%d" % i for i in range(5)]
+        resps = await asyncio.gather(
+            *(forwarder.query(w, request_id=f"req-{i}") for i, w in enumerate(wires))
+        )
+    finally:
+        await forwarder.close()
+
+    assert resps == [b"re:" + w for w in wires]
+    assert len(controller.script.received_dns_batches) == 1
+    assert len(controller.script.received_dns_batches[0]["items"]) == 5
+    snap = metrics.snapshot()
+    assert snap.get("upstream_relay_requests_total", 0) == 1
+    assert snap.get("upstream_relay_batched_items_total", 0) == 5
+    assert snap.get("upstream_requests_total", 0) == 5
+
+
+@pytest.mark.asyncio
+async def test_relay_forwarder_batch_flushes_at_max_items(fake_relay_server):
+    base_url, controller = fake_relay_server
+    controller.script.next_dns_results = _echo_items
+
+    forwarder = RelayUpstreamForwarder(
+        relay_cfg=RelayConfig(base_url=base_url, limits=RelayLimits(max_items=2)),
+        metrics=None,
+        timeout_s=0.5,
+        batch_window_s=10.0,
+    )
+    try:
+        wires = [b"query-%d" % i for i in range(4)]
+        resps = await asyncio.wait_for(
+            asyncio.gather(*(forwarder.query(w, request_id="req") for w in wires)), timeout=2.0
+        )
+    finally:
+        await forwarder.close()
+
+    assert resps == [b"re:" + w for w in wires]
+    assert [len(b["items"]) for b in controller.script.received_dns_batches] == [2, 2]
+
+
+@pytest.mark.parametrize("request_id", ["777", 'esc"aped'])
+def test_relay_batch_envelope_matches_json(request_id):
+    wires = [b"\x00\x01", bytes(range(30)), b"x"]
+    body = _encode_batch(request_id, wires)
+    items = [
+        RelayDnsItemRequest(id=str(i), q_b64=base64.b64encode(w).decode("ascii"))
+        for i, w in enumerate(wires)
+    ]
+    assert json.loads(body) == RelayDnsRequest(v=1, id=request_id, items=items).to_dict()
+
+
+@pytest.mark.asyncio
+async def test_relay_forwarder_splits_batch_over_request_limit(fake_relay_server):
+    base_url, controller = fake_relay_server
+    controller.script.next_dns_results = _echo_items
+    wires = [bytes(30), bytes(31)]
+    single = max(len(_encode_batch("req", [w])) for w in wires)
+
+    forwarder = RelayUpstreamForwarder(
+        relay_cfg=RelayConfig(base_url=base_url, limits=RelayLimits(max_request_bytes=single)),
+        metrics=None,
+        timeout_s=0.5,
+        batch_window_s=0.01,
+    )
+    try:
+        resps = await asyncio.gather(*(forwarder.query(w, request_id="req") for w in wires))
+    finally:
+        await forwarder.close()
+
+    assert resps == [b"re:" + w for w in wires]
+    assert [len(b["items"]) for b in controller.script.received_dns_batches] == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_relay_forwarder_batch_error_reaches_every_query(fake_relay_server):
+    base_url, controller = fake_relay_server
+    controller.script.force_protocol_v = 2
+
+    forwarder = RelayUpstreamForwarder(
+        relay_cfg=RelayConfig(base_url=base_url),
+        metrics=None,
+        timeout_s=0.5,
+        batch_window_s=0.01,
+    )
+    try:
+        results = await asyncio.gather(
+            *(forwarder.query(b"query", request_id="req") for _ in range(3)),
+            return_exceptions=True,
+        )
+    finally:
+        await forwarder.close()
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(controller.script.received_dns_batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_relay_forwarder_split_batch_keeps_answers_of_healthy_half(fake_relay_server):
+    base_url, controller = fake_relay_server
+
+    def results(data):
+        wire = base64.b64decode(data["items"][0]["q"])
+        return [DnsItemResult.ok_result("0", bytes(1000) if len(wire) == 31 else b"re:" + wire)]
+
+    controller.script.next_dns_results = results
+    wires = [bytes(30), bytes(31)]
+    single = max(len(_encode_batch("req", [w])) for w in wires)
+    limits = RelayLimits(max_request_bytes=single, max_response_bytes=500)
+
+    forwarder = RelayUpstreamForwarder(
+        relay_cfg=RelayConfig(base_url=base_url, limits=limits),
+        metrics=None,
+        timeout_s=0.5,
+        batch_window_s=0.01,
+    )
+    try:
+        ok, failed = await asyncio.gather(
+            *(forwarder.query(w, request_id="req") for w in wires), return_exceptions=True
+        )
+    finally:
+        await forwarder.close()
+
+    assert ok == b"re:" + bytes(30)
+    assert isinstance(failed, ValueError)
+
+
+@pytest.mark.asyncio
+async def test_relay_forwarder_close_waits_for_batches_in_flight(fake_relay_server):
+    base_url, controller = fake_relay_server
+    controller.script.dns_handler_mode = DnsHandlerMode.TIMEOUT
+
+    forwarder = RelayUpstreamForwarder(
+        relay_cfg=RelayConfig(base_url=base_url, limits=RelayLimits(max_items=2)),
+        metrics=None,
+        timeout_s=5.0,
+        batch_window_s=1.0,
+    )
+    queries = [asyncio.create_task(forwarder.query(b"q", request_id="req")) for _ in range(2)]
+    while controller.script.last_request_headers is None:
+        await asyncio.sleep(0.01)
+    assert forwarder._batch_tasks
+
+    await forwarder.close()
+    assert not forwarder._batch_tasks
+    assert await asyncio.gather(*queries) == [None, None]
+    controller.script.timeout_event.set()
@@ -27,7 +27,7 @@ def test_inflight_cap_drops_packets():
 
         class TestUdpServer(UdpDnsServer):
             def datagram_received(self, data: bytes, addr):
-                if self.config.max_inflight > 0 and len(self._inflight) >= self.config.max_inflight:
+                if self.config.max_inflight > 0 and self._pending >= self.config.max_inflight:
                     if self.metrics:
                         self.metrics.inc("dropped_total")
                         self.metrics.inc("dropped_max_inflight_total")
@@ -56,8 +56,7 @@ def test_inflight_cap_drops_packets():
             await asyncio.wait_for(drop_event.wait(), timeout=0.2)
         finally:
             gate.set()
-            if server._inflight:
-                await asyncio.gather(*list(server._inflight), return_exceptions=True)
+            await asyncio.wait_for(server._queue.join(), timeout=1.0)
             server.stop()
             await server_task
             sock.close()
@@ -67,3 +66,81 @@ def test_inflight_cap_drops_packets():
         assert snap.get("dropped_max_inflight_total", 0) > 0
 
     asyncio.run(run())
+
+
+def test_fresh_fast_path_answers_without_a_task():
+    async def run():
+        class FastHandler:
+            def try_handle_fresh(self, data: bytes):
+                return DNSRecord.parse(data).reply().pack()
+
+            async def handle(self, request: DNSRecord, client_addr):
+                raise AssertionError("slow path should not run")
+
+        server = UdpDnsServer(UdpServerConfig(host="127.0.0.1", port=0), handler=FastHandler())
+        server_task = asyncio.create_task(server.run())
+        await server.ready.wait()
+
+        assert server.transport is not None
+        host, port = server.transport.get_extra_info("sockname")
+        req = DNSRecord.question("example.com", qtype="A")
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        try:
+            sock.sendto(req.pack(), (host, port))
+            data = await asyncio.wait_for(loop.sock_recv(sock, 512), timeout=1.0)
+            assert DNSRecord.parse(data).header.id == req.header.id
+            assert server._pending == 0
+        finally:
+            server.stop()
+            await server_task
+            sock.close()
+
+    asyncio.run(run())
+
+
+def test_unbounded_inflight_handles_each_datagram_concurrently():
+    async def run():
+        n = 300  # more than the old fixed pool of 256 workers
+        gate = asyncio.Event()
+        started = 0
+
+        class BlockingHandler:
+            async def handle(self, request: DNSRecord, client_addr):
+                nonlocal started
+                started += 1
+                if started == n:
+                    gate.set()
+                await gate.wait()
+                return request.reply()
+
+        server = UdpDnsServer(
+            UdpServerConfig(host="127.0.0.1", port=0, max_inflight=0), handler=BlockingHandler()
+        )
+        server_task = asyncio.create_task(server.run())
+        await server.ready.wait()
+
+        assert server.transport is not None
+        assert not server._workers
+        host, port = server.transport.get_extra_info("sockname")
+        payload = DNSRecord.question("example.com", qtype="A").pack()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for i in range(n):
+                sock.sendto(payload, (host, port))
+                if i % 50 == 49:
+                    await asyncio.sleep(0.01)  # let the listener drain its receive buffer
+            # Every datagram is blocked in the handler at once; none waits in a queue.
+            await asyncio.wait_for(gate.wait(), timeout=2.0)
+            while server._pending:
+                await asyncio.sleep(0.01)
+        finally:
+            server.stop()
+            await server_task
+            sock.close()
+
+        assert not server._inflight
+
+    asyncio.run(run())
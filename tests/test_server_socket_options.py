@@ -0,0 +1,73 @@
+import asyncio
+import socket
+import sys
+
+import pytest
+
+from resilientdns.dns.server import (
+    TcpDnsServer,
+    TcpServerConfig,
+    UdpDnsServer,
+    UdpServerConfig,
+)
+
+
+class NullHandler:
+    async def handle(self, request, client_addr):
+        return request.reply()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="SO_BUSY_POLL is Linux-only")
+def test_udp_busy_poll_is_applied_to_listener():
+    async def run():
+        server = UdpDnsServer(
+            UdpServerConfig(host="127.0.0.1", port=0, busy_poll_us=50), handler=NullHandler()
+        )
+        server_task = asyncio.create_task(server.run())
+        await server.ready.wait()
+        try:
+            assert server.transport is not None
+            sock = server.transport.get_extra_info("socket")
+            value = sock.getsockopt(socket.SOL_SOCKET, getattr(socket, "SO_BUSY_POLL", 46))
+        finally:
+            server.stop()
+            await server_task
+        # Without CAP_NET_ADMIN the kernel may refuse the option; the server still runs.
+        assert value in (0, 50)
+
+    asyncio.run(run())
+
+
+def test_listener_buffer_sizes_are_applied():
+    async def run():
+        udp = UdpDnsServer(
+            UdpServerConfig(host="127.0.0.1", port=0, rcvbuf_bytes=4096, sndbuf_bytes=4096),
+            handler=NullHandler(),
+        )
+        tcp = TcpDnsServer(
+            TcpServerConfig(host="127.0.0.1", port=0, rcvbuf_bytes=4096, sndbuf_bytes=4096),
+            handler=NullHandler(),
+        )
+        tasks = [asyncio.create_task(udp.run()), asyncio.create_task(tcp.run())]
+        await udp.ready.wait()
+        await tcp.ready.wait()
+        try:
+            assert udp.transport is not None and tcp._server is not None
+            socks = [udp.transport.get_extra_info("socket"), *tcp._server.sockets]
+            sizes = [
+                (
+                    sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF),
+                    sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF),
+                )
+                for sock in socks
+            ]
+        finally:
+            udp.stop()
+            tcp.stop()
+            await asyncio.gather(*tasks)
+        # Linux reports double the requested size to account for bookkeeping overhead.
+        for rcvbuf, sndbuf in sizes:
+            assert rcvbuf in (4096, 8192)
+            assert sndbuf in (4096, 8192)
+
+    asyncio.run(run())
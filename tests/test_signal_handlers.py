@@ -8,7 +8,7 @@ class DummyLoop:
     def __init__(self) -> None:
         self.calls = []
 
-    def add_signal_handler(self, sig, callback) -> None:
+    def add_signal_handler(self, sig, callback, *args) -> None:
         self.calls.append(sig)
 
 
@@ -5,6 +5,7 @@ from dnslib import QTYPE, RR, A, DNSRecord
 
 from resilientdns.cache.memory import CacheConfig, CacheEntry, MemoryDnsCache
 from resilientdns.dns.handler import DnsHandler
+from resilientdns.dns.singleflight import SingleFlight
 
 
 class StubUpstream:
@@ -58,6 +59,34 @@ def test_singleflight_dedupes_concurrent_misses():
     asyncio.run(run())
 
 
+def test_get_or_create_passes_args_to_leader_factory_only():
+    async def run():
+        sf = SingleFlight()
+        gate = asyncio.Event()
+        calls = []
+
+        async def work(a, b):
+            calls.append((a, b))
+            await gate.wait()
+            return a + b
+
+        t1, leader1 = sf.get_or_create("k", work, 1, 2)
+        t2, leader2 = sf.get_or_create("k", work, 10, 20)
+        gate.set()
+
+        assert (leader1, leader2) == (True, False)
+        assert t1 is t2
+        assert await t1 == 3
+        assert calls == [(1, 2)]
+
+        await asyncio.sleep(0)
+        t3, leader3 = sf.get_or_create("k", work, 5, 5)
+        assert leader3 and t3 is not t1
+        assert await t3 == 10
+
+    asyncio.run(run())
+
+
 def test_stale_while_revalidate_refreshes_in_background():
     async def run():
         cache = MemoryDnsCache(CacheConfig(serve_stale_max_s=60))
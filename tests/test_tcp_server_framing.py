@@ -79,3 +79,111 @@ def test_tcp_oversize_length_drop():
         await server_task
 
     asyncio.run(run())
+
+
+def test_tcp_fresh_fast_path_answers_without_a_task():
+    async def run():
+        class FastHandler(EchoHandler):
+            def try_handle_fresh(self, data: bytes):
+                return DNSRecord.parse(data).reply().pack()
+
+            async def handle(self, request: DNSRecord, client_addr):
+                raise AssertionError("slow path should not run")
+
+        server = TcpDnsServer(TcpServerConfig(host="127.0.0.1", port=0), handler=FastHandler())
+        server_task = asyncio.create_task(server.run())
+        await server.ready.wait()
+
+        assert server._server is not None
+        host, port = server._server.sockets[0].getsockname()
+        reader, writer = await asyncio.open_connection(host, port)
+        req = DNSRecord.question("example.com", qtype="A")
+        for _ in range(2):
+            wire = req.pack()
+            writer.write(len(wire).to_bytes(2, "big") + wire)
+            await writer.drain()
+            resp_len = int.from_bytes(await reader.readexactly(2), "big")
+            resp = DNSRecord.parse(await reader.readexactly(resp_len))
+            assert resp.header.id == req.header.id
+        assert not server._inflight
+
+        writer.close()
+        await writer.wait_closed()
+        server.stop()
+        await server_task
+
+    asyncio.run(run())
+
+
+def test_tcp_pipelined_requests_complete_out_of_order():
+    async def run():
+        gate = asyncio.Event()
+
+        class OrderedHandler(EchoHandler):
+            async def handle(self, request: DNSRecord, client_addr):
+                if str(request.q.qname) == "slow.example.":
+                    await gate.wait()
+                else:
+                    gate.set()
+                return await super().handle(request, client_addr)
+
+        server = TcpDnsServer(TcpServerConfig(host="127.0.0.1", port=0), handler=OrderedHandler())
+        server_task = asyncio.create_task(server.run())
+        await server.ready.wait()
+
+        assert server._server is not None
+        host, port = server._server.sockets[0].getsockname()
+        reader, writer = await asyncio.open_connection(host, port)
+        for name in ("slow.example", "fast.example"):
+            wire = DNSRecord.question(name, qtype="A").pack()
+            writer.write(len(wire).to_bytes(2, "big") + wire)
+        await writer.drain()
+
+        names = []
+        for _ in range(2):
+            prefix = await asyncio.wait_for(reader.readexactly(2), timeout=1.0)
+            resp = DNSRecord.parse(await reader.readexactly(int.from_bytes(prefix, "big")))
+            names.append(str(resp.q.qname))
+        assert names == ["fast.example.", "slow.example."]
+
+        writer.close()
+        await writer.wait_closed()
+        server.stop()
+        await server_task
+
+    asyncio.run(run())
+
+
+def test_tcp_idle_and_read_timeouts_close_connection():
+    async def run():
+        server = TcpDnsServer(
+            TcpServerConfig(host="127.0.0.1", port=0, idle_timeout_s=0.05, read_timeout_s=0.05),
+            handler=EchoHandler(),
+        )
+        server_task = asyncio.create_task(server.run())
+        await server.ready.wait()
+
+        assert server._server is not None
+        host, port = server._server.sockets[0].getsockname()
+
+        # Idle: nothing sent at all.
+        reader, writer = await asyncio.open_connection(host, port)
+        assert await asyncio.wait_for(reader.read(1), timeout=1.0) == b""
+        writer.close()
+        await writer.wait_closed()
+
+        # Read: a length prefix whose body never arrives, after one good exchange.
+        reader, writer = await asyncio.open_connection(host, port)
+        wire = DNSRecord.question("example.com", qtype="A").pack()
+        writer.write(len(wire).to_bytes(2, "big") + wire + (100).to_bytes(2, "big"))
+        await writer.drain()
+        resp_len = int.from_bytes(await reader.readexactly(2), "big")
+        assert DNSRecord.parse(await reader.readexactly(resp_len)).rr
+        assert await asyncio.wait_for(reader.read(1), timeout=1.0) == b""
+        writer.close()
+        await writer.wait_closed()
+
+        server.stop()
+        await server_task
+
+    asyncio.run(run())
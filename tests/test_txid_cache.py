@@ -3,7 +3,8 @@ import asyncio
 from dnslib import QTYPE, RR, A, DNSRecord
 
 from resilientdns.cache.memory import CacheConfig, MemoryDnsCache
-from resilientdns.dns.handler import DnsHandler
+from resilientdns.dns.handler import DnsHandler, HandlerConfig
+from resilientdns.metrics import Metrics
 
 
 class FakeUpstream:
@@ -56,3 +57,121 @@ def test_cache_hit_txid_rewrite():
         assert resp2.rr[0].rdata == resp1.rr[0].rdata
 
     asyncio.run(run())
+
+
+def test_handle_wire_patches_txid_on_cached_bytes():
+    async def run():
+        cache = MemoryDnsCache(CacheConfig())
+        upstream = FakeUpstream([lambda wire: _make_response(wire, "1.2.3.4")])
+        handler = DnsHandler(upstream=upstream, cache=cache)
+
+        req1 = DNSRecord.question("example.com", qtype="A")
+        req1.header.id = 0x1234
+        wire1 = await handler.handle_wire(req1, ("127.0.0.1", 5353))
+
+        req2 = DNSRecord.question("example.com", qtype="A")
+        req2.header.id = 0xBEEF
+        wire2 = await handler.handle_wire(req2, ("127.0.0.1", 5353))
+
+        assert upstream.calls == 1
+        assert wire1[:2] == b"\x12\x34"
+        assert wire2[:2] == b"\xbe\xef"
+        assert wire2[2:] == wire1[2:]
+
+    asyncio.run(run())
+
+
+def test_mixed_case_qnames_share_cache_entry():
+    async def run():
+        cache = MemoryDnsCache(CacheConfig())
+        upstream = FakeUpstream([lambda wire: _make_response(wire, "1.2.3.4")])
+        handler = DnsHandler(upstream=upstream, cache=cache)
+
+        await handler.handle(DNSRecord.question("Example.COM", qtype="A"), ("127.0.0.1", 5353))
+        await handler.handle(DNSRecord.question("example.com", qtype="A"), ("127.0.0.1", 5353))
+        await handler.handle(DNSRecord.question("EXAMPLE.com.", qtype="A"), ("127.0.0.1", 5353))
+
+        assert upstream.calls == 1
+        assert cache.peek(("example.com", int(QTYPE.A), 1)) is not None
+
+    asyncio.run(run())
+
+
+def test_offloaded_parse_resolves_miss():
+    async def run():
+        cache = MemoryDnsCache(CacheConfig())
+        upstream = FakeUpstream([lambda wire: _make_response(wire, "1.2.3.4")])
+        handler = DnsHandler(
+            upstream=upstream, cache=cache, config=HandlerConfig(parse_offload_min_bytes=1)
+        )
+        try:
+            req = DNSRecord.question("example.com", qtype="A")
+            resp = await handler.handle(req, ("127.0.0.1", 5353))
+        finally:
+            handler.close()
+
+        assert resp.header.id == req.header.id
+        assert str(resp.rr[0].rdata) == "1.2.3.4"
+        assert handler._parse_executor is None
+
+    asyncio.run(run())
+
+
+def test_singleflight_joiners_each_get_their_own_txid():
+    class GatedUpstream:
+        def __init__(self):
+            self.gate = asyncio.Event()
+            self.calls = 0
+
+        async def query(self, wire: bytes):
+            self.calls += 1
+            await self.gate.wait()
+            return _make_response(wire, "1.2.3.4")
+
+    async def run():
+        upstream = GatedUpstream()
+        handler = DnsHandler(upstream=upstream, cache=MemoryDnsCache(CacheConfig()))
+        requests = []
+        for txid in (0x0101, 0x0202, 0x0303):
+            req = DNSRecord.question("example.com", qtype="A")
+            req.header.id = txid
+            requests.append(req)
+
+        tasks = [asyncio.create_task(handler.handle_wire(r, ("127.0.0.1", 5353))) for r in requests]
+        await asyncio.sleep(0)
+        upstream.gate.set()
+        wires = await asyncio.gather(*tasks)
+
+        assert upstream.calls == 1
+        assert [w[:2] for w in wires] == [b"\x01\x01", b"\x02\x02", b"\x03\x03"]
+        assert len({w[2:] for w in wires}) == 1
+
+    asyncio.run(run())
+
+
+def test_try_handle_fresh_serves_hits_from_request_bytes():
+    async def run():
+        cache = MemoryDnsCache(CacheConfig())
+        metrics = Metrics()
+        upstream = FakeUpstream([lambda wire: _make_response(wire, "1.2.3.4")])
+        handler = DnsHandler(upstream=upstream, cache=cache, metrics=metrics)
+
+        req = DNSRecord.question("Example.COM", qtype="A")
+        req.header.id = 0x0102
+        assert handler.try_handle_fresh(req.pack()) is None
+        await handler.handle_wire(req, ("127.0.0.1", 5353))
+
+        req.header.id = 0xBEEF
+        wire = handler.try_handle_fresh(req.pack())
+        assert wire is not None
+        resp = DNSRecord.parse(wire)
+        assert resp.header.id == 0xBEEF
+        assert str(resp.rr[0].rdata) == "1.2.3.4"
+        assert upstream.calls == 1
+
+        snap = metrics.snapshot()
+        assert snap["queries_total"] == 2
+        assert snap["cache_hit_fresh_total"] == 1
+        assert snap["cache_miss_total"] == 1
+
+    asyncio.run(run())
@@ -87,3 +87,46 @@ def test_udp_malformed_increments_metric():
         assert snap.get("malformed_total", 0) >= 1
 
     asyncio.run(run())
+
+
+def test_udp_response_packets_are_rejected_before_parsing():
+    async def run():
+        metrics = Metrics()
+        server = UdpDnsServer(
+            UdpServerConfig(host="127.0.0.1", port=0),
+            handler=LargeResponseHandler(),
+            metrics=metrics,
+        )
+        reply = DNSRecord.question("example.com", qtype="A").reply().pack()
+        server.datagram_received(reply, ("127.0.0.1", 5353))
+        server.datagram_received(b"\x00" * 11, ("127.0.0.1", 5353))
+
+        assert server._pending == 0
+        snap = metrics.snapshot()
+        assert snap.get("malformed_total", 0) == 2
+        assert snap.get("dropped_malformed_total", 0) == 2
+
+    asyncio.run(run())
+
+
+def test_udp_drop_counts_are_flushed_on_stop():
+    async def run():
+        metrics = Metrics()
+        server = UdpDnsServer(
+            UdpServerConfig(host="127.0.0.1", port=0),
+            handler=LargeResponseHandler(),
+            metrics=metrics,
+        )
+        server_task = asyncio.create_task(server.run())
+        await server.ready.wait()
+
+        for _ in range(3):
+            server.datagram_received(b"\x00" * 4, ("127.0.0.1", 5353))
+        server.stop()
+        await server_task
+
+        snap = metrics.snapshot()
+        assert snap.get("malformed_total", 0) == 3
+        assert snap.get("dropped_malformed_total", 0) == 3
+
+    asyncio.run(run())
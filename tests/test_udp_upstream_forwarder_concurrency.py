@@ -1,4 +1,5 @@
 import asyncio
+import socket
 
 from dnslib import QTYPE, RR, A, DNSRecord
 
@@ -113,3 +114,27 @@ def test_udp_upstream_error_metric():
         transport.close()
 
     asyncio.run(run())
+
+
+def test_udp_upstream_unreachable_port_is_an_error_not_a_timeout():
+    async def run():
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        probe.bind(("127.0.0.1", 0))
+        host, port = probe.getsockname()
+        probe.close()
+
+        metrics = Metrics()
+        forwarder = UdpUpstreamForwarder(
+            UpstreamUdpConfig(host=host, port=port, timeout_s=1.0),
+            metrics=metrics,
+        )
+        wire = DNSRecord.question("example.com", qtype="A").pack()
+        resp = await asyncio.wait_for(forwarder.query(wire), timeout=0.5)
+        assert resp is None
+        snap = metrics.snapshot()
+        assert snap.get("upstream_udp_errors_total", 0) == 1
+        assert snap.get("upstream_udp_timeouts_total", 0) == 0
+
+        forwarder.close()
+
+    asyncio.run(run())
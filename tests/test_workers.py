@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+from resilientdns.workers import pin_cpu, run_workers
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+
+
+def test_run_workers_runs_each_index_once(tmp_path):
+    def target(index: int) -> None:
+        (tmp_path / f"worker-{index}").write_text(str(os.getpid()))
+
+    assert run_workers(3, target) == 0
+
+    pids = {(tmp_path / f"worker-{i}").read_text() for i in range(3)}
+    assert len(pids) == 3
+    assert str(os.getpid()) not in pids
+
+
+def test_run_workers_reports_failed_worker():
+    def target(index: int) -> None:
+        if index == 1:
+            sys.exit(3)
+
+    assert run_workers(2, target) == 1
+
+
+def test_run_workers_rejects_zero():
+    with pytest.raises(ValueError):
+        run_workers(0, lambda _index: None)
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="requires sched_setaffinity")
+def test_pin_cpu_picks_one_allowed_cpu_per_worker(tmp_path):
+    allowed = sorted(os.sched_getaffinity(0))
+
+    def target(index: int) -> None:
+        pin_cpu(index)
+        (tmp_path / f"worker-{index}").write_text(",".join(map(str, os.sched_getaffinity(0))))
+
+    assert run_workers(2, target) == 0
+
+    for i in range(2):
+        assert (tmp_path / f"worker-{i}").read_text() == str(allowed[i % len(allowed)])
+    assert sorted(os.sched_getaffinity(0)) == allowed